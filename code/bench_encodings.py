@@ -0,0 +1,140 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+Benchmark of the variants of the SAT encoding on the bundled levels (or any level file).
+
+For every level and every variant: size of the formula, encoding and solving time, and the
+statistics of the solver (conflicts, decisions, propagations). Every plan found is checked
+with the simulator.
+Run: python3 bench_encodings.py [--engine sat|asp] [--variants base,invariants] ../levels/level*.txt
+"""
+
+import argparse
+from time import perf_counter
+from utils_helltaker import grid_from_file
+from utils_simulation import check_solution
+
+# options of `level_data_to_clauses` for each variant
+VARIANTS = {
+    "base": {},
+    "invariants": {"invariants": True},
+    "trap_phase": {"trap_phase": True},
+    "binary": {"binary_position": True},
+    "stop_at_goal": {"stop_at_goal": True},
+    "dominance": {"stop_at_goal": True, "dominance": True},
+}
+
+
+# options of `grid_to_model` for each variant
+ASP_VARIANTS = {
+    "base": {},
+    "trap_phase": {"trap_phase": True},
+    "dominance": {"dominance": True},
+}
+
+
+def run_asp_variant(infos: dict, options: dict) -> dict:
+    """
+    :param infos: dict containing all map data
+    :param options: options of the ASP model
+    :return: measures of the grounding and of the solving
+    """
+    import clingo
+    from utils_asp import grid_to_model, convert_model
+
+    start = perf_counter()
+    ctl = clingo.Control(["-n 1", "--warn=none"])
+    ctl.add("base", [], grid_to_model(infos, **options))
+    ctl.ground([("base", [])])
+    grounded = perf_counter()
+
+    models = []
+    ctl.solve(on_model=lambda m: models.append(m.symbols(shown=True)))
+    solved = perf_counter()
+
+    plan = None
+    if models:
+        plan = convert_model(sorted(models[0], key=lambda a: a.arguments[1].number))
+    stats = ctl.statistics
+
+    return {
+        "atoms": int(stats["problem"]["lp"]["atoms"]),
+        "rules": int(stats["problem"]["lp"]["rules"]),
+        "ground_s": grounded - start,
+        "solve_s": solved - grounded,
+        "choices": int(stats["solving"]["solvers"]["choices"]),
+        "conflicts": int(stats["solving"]["solvers"]["conflicts"]),
+        "plan": plan,
+        "valid": plan is not None and check_solution(infos, plan),
+    }
+
+
+def run_variant(infos: dict, options: dict) -> dict:
+    """
+    :param infos: dict containing all map data
+    :param options: options of the encoding
+    :return: measures of the encoding and of the solving
+    """
+    from pysat.solvers import Glucose4
+    from utils_sat import level_data_to_clauses, convert_model
+
+    start = perf_counter()
+    v2n, clauses = level_data_to_clauses(infos, **options)
+    clauses = clauses.unique()
+    encoded = perf_counter()
+
+    with Glucose4(bootstrap_with=clauses) as g:
+        sat = g.solve()
+        solved = perf_counter()
+        stats = g.accum_stats()
+        model = g.get_model() if sat else None
+
+    plan = None
+    if sat:
+        n2v = {i: v for v, i in v2n.items()}
+        plan = convert_model([n2v[i] for i in model if i > 0 and n2v[i][0] == "do"])
+
+    return {
+        "vars": len(v2n),
+        "clauses": len(clauses),
+        "encode_s": encoded - start,
+        "solve_s": solved - encoded,
+        "conflicts": stats.get("conflicts", 0),
+        "decisions": stats.get("decisions", 0),
+        "propagations": stats.get("propagations", 0),
+        "plan": plan,
+        "valid": plan is not None and check_solution(infos, plan),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("levels", nargs="+")
+    parser.add_argument("--engine", choices=("sat", "asp"), default="sat")
+    parser.add_argument("--variants", default=None)
+    args = parser.parse_args()
+
+    if args.engine == "sat":
+        variants, run = VARIANTS, run_variant
+        columns = ("vars", "clauses", "encode_s", "solve_s")
+        columns += ("conflicts", "decisions", "propagations", "valid")
+    else:
+        variants, run = ASP_VARIANTS, run_asp_variant
+        columns = ("atoms", "rules", "ground_s", "solve_s")
+        columns += ("choices", "conflicts", "valid")
+
+    print("level".ljust(12), "variant".ljust(14), *(c.rjust(12) for c in columns))
+    for filename in args.levels:
+        infos = grid_from_file(filename)
+        for variant in (args.variants or ",".join(variants)).split(","):
+            res = run(infos, variants[variant])
+            values = [
+                f"{res[c]:.3f}" if isinstance(res[c], float) else str(res[c])
+                for c in columns
+            ]
+            name = filename.split("/")[-1]
+            print(name.ljust(12), variant.ljust(14), *(v.rjust(12) for v in values))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+Scaling benchmark of the SAT and ASP approaches on generated levels.
+
+For every grid size and every horizon, a level is generated (see `utils_generator`) and solved
+by each engine in a separate process. The time of each phase (encoding or grounding, solving)
+and the memory used are written to a csv file, and plotted if matplotlib is installed.
+Run: python3 bench_scaling.py --sizes 8,12,16 --extra-horizons 0,4,8
+"""
+
+import argparse
+import csv
+import multiprocessing
+import resource
+import sys
+import tracemalloc
+from time import perf_counter
+from utils_generator import generate_level
+
+FIELDS = (
+    "engine",
+    "seed",
+    "m",
+    "n",
+    "area",
+    "horizon",
+    "status",
+    "encode_s",
+    "solve_s",
+    "peak_mb",
+    "maxrss_mb",
+)
+
+
+def measure_sat(infos: dict) -> dict:
+    """
+    :param infos: dict containing all map data
+    :return: timings (s) of the encoding and of the solving
+    """
+    from utils_sat import level_data_to_clauses, exec_pysat_clauses
+
+    start = perf_counter()
+    _, clauses = level_data_to_clauses(infos)
+    clauses = clauses.unique()
+    encoded = perf_counter()
+    sat, _ = exec_pysat_clauses(clauses)
+
+    return {
+        "status": "sat" if sat else "unsat",
+        "encode_s": encoded - start,
+        "solve_s": perf_counter() - encoded,
+    }
+
+
+def measure_asp(infos: dict) -> dict:
+    """
+    :param infos: dict containing all map data
+    :return: timings (s) of the grounding and of the solving
+    """
+    import clingo
+    from utils_asp import grid_to_model
+
+    start = perf_counter()
+    ctl = clingo.Control(["-n 1", "--warn=none"])
+    ctl.add("base", [], grid_to_model(infos))
+    ctl.ground([("base", [])])
+    grounded = perf_counter()
+    result = ctl.solve()
+
+    return {
+        "status": "sat" if result.satisfiable else "unsat",
+        "encode_s": grounded - start,
+        "solve_s": perf_counter() - grounded,
+    }
+
+
+ENGINES = {"sat": measure_sat, "asp": measure_asp}
+
+
+def _run(engine: str, infos: dict, queue):
+    tracemalloc.start()
+    record = ENGINES[engine](infos)
+    record["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+    # ru_maxrss est en kilo-octets sous Linux
+    record["maxrss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+    queue.put(record)
+
+
+def measure(engine: str, infos: dict, timeout: float) -> dict:
+    """
+    :param engine: "sat" or "asp"
+    :param infos: dict containing all map data
+    :param timeout: time limit (s), the process is killed beyond it
+    :return: measures of the engine on this level, in a fresh process
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run, args=(engine, infos, queue))
+    process.start()
+    process.join(timeout)
+
+    if process.is_alive():
+        process.kill()
+        process.join()
+        return {"status": "timeout"}
+    if process.exitcode != 0 or queue.empty():
+        return {"status": "error"}
+    return queue.get()
+
+
+def benchmark(sizes, extra_horizons, seed: int, timeout: float, engines, **params):
+    """
+    :param sizes: list of grid sizes (square grids)
+    :param extra_horizons: moves added to the shortest plan to get the tested horizons
+    :param seed: seed of the generated levels
+    :param timeout: time limit of each solve (s)
+    :param engines: engines to benchmark
+    :param params: parameters of `generate_level`
+    :return: iterator over the measures
+    """
+    for size in sizes:
+        infos = generate_level(seed, size, size, **params)
+        if infos is None:
+            print(f"no level generated for size {size}", file=sys.stderr)
+            continue
+        shortest = infos["max_steps"]
+        area = sum(c != "#" for line in infos["grid"] for c in line)
+
+        for extra in extra_horizons:
+            level = dict(infos, max_steps=shortest + extra)
+            for engine in engines:
+                record = {
+                    "engine": engine,
+                    "seed": seed,
+                    "m": size,
+                    "n": size,
+                    "area": area,
+                    "horizon": shortest + extra,
+                }
+                record.update(measure(engine, level, timeout))
+                yield record
+
+
+def plot(records, filename: str):
+    """
+    :param records: measures of the benchmark
+    :param filename: image file
+    :return: plot time and memory against the area and the horizon
+    """
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed, no plot", file=sys.stderr)
+        return
+
+    fig, axes = plt.subplots(2, 2, figsize=(12, 9))
+    for row, x in enumerate(("area", "horizon")):
+        for engine in sorted({r["engine"] for r in records}):
+            points = sorted(
+                (r for r in records if r["engine"] == engine and "solve_s" in r),
+                key=lambda r: r[x],
+            )
+            xs = [r[x] for r in points]
+            encode = [r["encode_s"] for r in points]
+            solve = [r["solve_s"] for r in points]
+            axes[row][0].plot(xs, encode, "o--", label=f"{engine} encode/ground")
+            axes[row][0].plot(xs, solve, "o-", label=f"{engine} solve")
+            axes[row][1].plot(xs, [r["maxrss_mb"] for r in points], "o-", label=engine)
+        axes[row][0].set_xlabel(x)
+        axes[row][0].set_ylabel("time (s)")
+        axes[row][0].set_yscale("log")
+        axes[row][1].set_xlabel(x)
+        axes[row][1].set_ylabel("max rss (MB)")
+        axes[row][0].legend()
+        axes[row][1].legend()
+
+    fig.tight_layout()
+    fig.savefig(filename)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", default="8,10,12,14,16")
+    parser.add_argument("--extra-horizons", default="0")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--engines", default="sat,asp")
+    parser.add_argument("--blocks", type=int, default=3)
+    parser.add_argument("--mobs", type=int, default=2)
+    parser.add_argument("--spikes", type=int, default=2)
+    parser.add_argument("--traps", type=int, default=2)
+    parser.add_argument("--keys", type=int, default=0)
+    parser.add_argument("--out", default="bench_scaling.csv")
+    parser.add_argument("--plot", default="bench_scaling.png")
+    args = parser.parse_args()
+
+    records = []
+    with open(args.out, "w", newline="", encoding="utf8") as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        for record in benchmark(
+            [int(s) for s in args.sizes.split(",")],
+            [int(h) for h in args.extra_horizons.split(",")],
+            args.seed,
+            args.timeout,
+            args.engines.split(","),
+            blocks=args.blocks,
+            mobs=args.mobs,
+            spikes=args.spikes,
+            traps=args.traps,
+            keys=args.keys,
+        ):
+            print(record)
+            writer.writerow(record)
+            f.flush()
+            records.append(record)
+
+    if args.plot:
+        plot(records, args.plot)
+
+
+if __name__ == "__main__":
+    main()
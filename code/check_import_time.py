@@ -0,0 +1,109 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+Import-time budget of the command line solves, measured with `python -X importtime`: each entry
+point solves a tiny level, so the modules its solving path loads on demand are counted too
+Run: python3 check_import_time.py [budget_ms]
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+ENTRY_POINTS = ("plan_sat", "plan_asp")
+
+# modules that must only be loaded once a solving path is actually used
+LAZY_MODULES = ("clingo", "pysat", "subprocess", "utils_sat", "utils_asp")
+
+# modules of the other engine, never loaded by a solve
+OTHER_ENGINE = {
+    "plan_sat": ("clingo", "utils_asp"),
+    "plan_asp": ("pysat", "utils_sat", "utils_clauses", "utils_index"),
+}
+
+# niveau résolu instantanément : seuls les imports comptent
+LEVEL = "import time\n3\n#######\n#HKL D#\n#######\n"
+
+# mesuré (meilleur de 5) : ~44ms par solve, dont pysat ~15ms ou clingo ~23ms, typing
+# ~19ms et site ~4ms ; jusqu'à 69ms sur une machine chargée, d'où la marge
+DEFAULT_BUDGET_MS = 75.0
+
+
+def measure_imports(args: List[str], cwd: str = None) -> Tuple[Dict[str, int], int]:
+    """
+    :param args: arguments of python, after -X importtime
+    :param cwd: directory the command is run in
+    :return: dict giving the cumulative import time (us) of every module imported, and the
+        total import time (us) of the run (sum over the top-level imports)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        capture_output=True,
+        check=True,
+        cwd=cwd,
+        encoding="utf8",
+    )
+
+    timings = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = int(cumulative)
+        # les imports imbriqués sont décalés d'au moins deux espaces
+        if not name.startswith("  "):
+            total += int(cumulative)
+
+    return timings, total
+
+
+def check_import_time(budget_ms: float = DEFAULT_BUDGET_MS, runs: int = 5) -> bool:
+    """
+    :param budget_ms: maximal import time of a solve by each entry point (ms)
+    :param runs: number of measurements, the best one is kept to smooth out noise
+    :return: True if the solves stay within the budget, the entry points do not load any
+        solver at start-up and a solve does not load the other engine
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    ok = True
+
+    timings, _ = measure_imports(["-c", "import " + ", ".join(ENTRY_POINTS)], here)
+    for module in LAZY_MODULES:
+        if module in timings:
+            print(f"[Err] {module} is imported at start-up")
+            ok = False
+
+    # la cnf écrite par le solve SAT reste dans le dossier temporaire
+    with tempfile.TemporaryDirectory(prefix="helltaker_") as tmpdir:
+        level = os.path.join(tmpdir, "level.txt")
+        with open(level, "w", encoding="utf-8") as f:
+            f.write(LEVEL)
+
+        for entry in ENTRY_POINTS:
+            best = None
+            for _ in range(runs):
+                script = os.path.join(here, entry + ".py")
+                timings, total = measure_imports([script, level], tmpdir)
+                best = total if best is None else min(best, total)
+
+            for module in OTHER_ENGINE[entry]:
+                if module in timings:
+                    print(f"[Err] {module} is imported by a solve of {entry}")
+                    ok = False
+
+            best /= 1000
+            if best > budget_ms:
+                print(f"[Err] {entry}: import time {best:.1f}ms > budget {budget_ms}ms")
+                ok = False
+            else:
+                print(f"[OK] {entry}: import time {best:.1f}ms <= budget {budget_ms}ms")
+
+    return ok
+
+
+if __name__ == "__main__":
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    sys.exit(0 if check_import_time(budget) else 1)
@@ -0,0 +1,80 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+Regression check of the invariants (`utils_invariants`): the redundant clauses must not remove
+any plan, so every level keeps the satisfiability it has without them
+Run: python3 check_invariants.py [level files...]
+"""
+
+import sys
+from utils_helltaker import grid_from_file
+
+# petits niveaux sur lesquels les invariants ont déjà supprimé des plans
+REGRESSIONS = {
+    # la clé ramassée au pas t ouvre le lock au pas t + 1 (plan rrr)
+    "key next to the lock": (3, ["#######", "#HKL D#", "#######"]),
+}
+
+
+def regression_level(title: str, max_steps: int, rows: list) -> dict:
+    """
+    :param title: title of the level
+    :param max_steps: horizon
+    :param rows: lines of the grid
+    :return: dict containing all map data, as given by `grid_from_file`
+    """
+    n = max(len(row) for row in rows)
+    grid = [list(row.ljust(n)) for row in rows]
+    return {
+        "grid": grid,
+        "title": title,
+        "m": len(grid),
+        "n": n,
+        "max_steps": max_steps,
+    }
+
+
+def check_level(infos: dict) -> bool:
+    """
+    :param infos: dict containing all map data
+    :return: True if the invariants keep the satisfiability of the level, with and without
+        stop_at_goal
+    """
+    from utils_sat import sat_solving
+
+    ok = True
+    for stop_at_goal in (False, True):
+        plain = sat_solving(infos, "pysat", stop_at_goal=stop_at_goal)
+        strengthened = sat_solving(
+            infos, "pysat", invariants=True, stop_at_goal=stop_at_goal
+        )
+        if (plain is None) != (strengthened is None):
+            print(
+                f"[Err] {infos['title']} (stop_at_goal={stop_at_goal}):",
+                "sat" if plain is not None else "unsat",
+                "without invariants,",
+                "sat" if strengthened is not None else "unsat",
+                "with them",
+            )
+            ok = False
+    if ok:
+        print(f"[OK] {infos['title']}")
+    return ok
+
+
+def check_invariants(filenames: list = ()) -> bool:
+    """
+    :param filenames: level files checked after the regression levels
+    :return: True if the invariants keep the satisfiability of every level
+    """
+    levels = [regression_level(t, *level) for t, level in REGRESSIONS.items()]
+    levels += [grid_from_file(f) for f in filenames]
+
+    ok = True
+    for infos in levels:
+        ok = check_level(infos) and ok
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_invariants(sys.argv[1:]) else 1)
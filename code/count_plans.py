@@ -0,0 +1,42 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+Count the distinct plans of each level (projected on the direction of each step, udlr), without
+keeping the models, with ASP (clingo projection) and/or SAT (enumeration with blocking clauses).
+
+Run: python3 count_plans.py [--engine asp|sat|both] ../levels/level*.txt
+"""
+
+import os
+from utils_helltaker import grid_from_file
+
+
+def main():
+    """
+    Print the number of plans and the counting time of each level
+    """
+    import argparse
+    from utils_asp import count_plans
+    from utils_sat import sat_count
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("levels", nargs="+", help="level files")
+    parser.add_argument("--engine", choices=("asp", "sat", "both"), default="asp")
+    args = parser.parse_args()
+
+    engines = ("asp", "sat") if args.engine == "both" else (args.engine,)
+    counters = {"asp": count_plans, "sat": sat_count}
+
+    print(f"{'level':<12} {'engine':<6} {'plans':>8} {'time_s':>9}")
+    for filename in args.levels:
+        infos = grid_from_file(filename)
+        for engine in engines:
+            res = counters[engine](infos)
+            time_s = res.get("ground_s", 0) + res["solve_s"]
+            plans = res["plans"] if res["exhausted"] else f">={res['plans']}"
+            name = os.path.basename(filename)
+            print(f"{name:<12} {engine:<6} {plans:>8} {time_s:>9.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,18 +6,31 @@ Helltaker plan computing using Answer Set Programming (ASP)
 
 import sys
 from utils_helltaker import grid_from_file, check_plan
-from utils_asp import grid_to_model, call_solver, convert_model
 
 
 def plan_asp(infos):
     """
     :param infos: dict containing all map data
-    :return: string sequence of instructions (hbgd)
+    :return: string sequence of instructions (hbgd), None if there is no plan
     """
-    asp_problem = grid_to_model(data=infos)
+    # the solver module is only imported once a plan is actually requested
+    from utils_asp import grid_to_model, call_solver, convert_model
+    from utils_bounds import is_trivially_infeasible
+    from utils_trace import phase
+
+    # no grounding at all when the shortest path already exceeds the horizon
+    if is_trivially_infeasible(infos):
+        return None
+
+    with phase("facts"):
+        asp_problem = grid_to_model(data=infos)
     models = call_solver(asp_problem=asp_problem, n_models=1)
 
-    return convert_model(models[0])
+    if not models:
+        return None
+
+    with phase("decode"):
+        return convert_model(models[0])
 
 
 def main():
@@ -25,16 +38,69 @@ def main():
     Main function of ASP solving
     :return: print sequence of instructions to solve the given problem
     """
-    # recovery the file name from the command line
-    filename = sys.argv[1]
+    import argparse
+    import utils_trace
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("filename", help="level file")
+    parser.add_argument(
+        "--optimal", action="store_true", help="search the optimal number of moves"
+    )
+    parser.add_argument(
+        "--processes", type=int, help="horizons solved in parallel (--optimal)"
+    )
+    parser.add_argument(
+        "--landmarks",
+        action="store_true",
+        help="solve key, lock and demoness as legs (else in one go, with deadlines)",
+    )
+    parser.add_argument("--trace", metavar="FILE", help="write a trace of the phases")
+    parser.add_argument(
+        "--trace-format",
+        choices=utils_trace.FORMATS,
+        default="json",
+        help="trace format",
+    )
+    args = parser.parse_args()
+
+    if args.trace:
+        utils_trace.enable(args.trace, args.trace_format)
 
     # recovery of the grid and all the information
-    infos = grid_from_file(filename)
+    with utils_trace.phase("parse_level"):
+        infos = grid_from_file(args.filename)
+
+    if args.optimal:
+        from utils_sweep import horizon_sweep
 
-    # plan computing
-    plan = plan_asp(infos)
+        result = horizon_sweep(infos, "asp", args.processes)
+        if result is None:
+            print("[Err] no plan in", infos["max_steps"], "moves", file=sys.stderr)
+            sys.exit(1)
+        print("optimal number of moves:", result[0])
+        plan = result[1]
+    elif args.landmarks:
+        from utils_landmarks import plan_landmarks
+
+        stats = {}
+        plan = plan_landmarks(infos, "asp", stats=stats)
+        print(
+            "landmarks:",
+            stats["landmarks"],
+            "leg solves:",
+            stats["solves"],
+            "monolithic:",
+            stats["monolithic"],
+            file=sys.stderr,
+        )
+    else:
+        # plan computing
+        plan = plan_asp(infos)
 
     # result printing
+    if plan is None:
+        print("[Err] no plan in", infos["max_steps"], "moves", file=sys.stderr)
+        sys.exit(1)
     if check_plan(plan):
         print("[OK]", plan)
     else:
@@ -0,0 +1,62 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+Helltaker hints: the rest of a plan from the moves already played, solved over the remaining
+horizon only
+"""
+
+import sys
+from utils_helltaker import grid_from_file, check_plan
+
+
+def main():
+    """
+    Main function of the hints
+    :return: print the moves completing each given prefix
+    """
+    import argparse
+    from utils_hint import ENGINES, hint
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("filename", help="level file")
+    parser.add_argument("prefixes", nargs="*", default=[""], help="moves played (udlr)")
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="sat",
+        help="engine of the remaining horizon",
+    )
+    args = parser.parse_args()
+
+    infos = grid_from_file(args.filename)
+
+    # un seul cache pour tous les préfixes : les états communs ne sont résolus qu'une fois
+    cache = {}
+    status = 0
+    for prefix in args.prefixes:
+        stats = {}
+        try:
+            suffix = hint(infos, prefix, args.engine, cache, stats)
+        except ValueError as e:
+            print("[Err]", prefix, e, file=sys.stderr)
+            status = 2
+            continue
+
+        details = (
+            f"({stats['moves_left']} moves left,"
+            f" {'cached' if stats['cached'] else 'solved'}"
+            f" in {stats['time_s']:.3f} s)"
+        )
+        if suffix is None:
+            print("[Err]", prefix, "no plan from here", details, file=sys.stderr)
+            status = status or 1
+        elif check_plan(suffix):
+            print("[OK]", prefix, "+", suffix, details)
+        else:
+            print("[Err]", prefix, "+", suffix, file=sys.stderr)
+            status = 2
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
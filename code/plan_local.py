@@ -0,0 +1,91 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+Helltaker plan computing using stochastic local search over the simulator, with a complete
+planner (SAT or ASP) as fallback once the budget is spent
+"""
+
+import sys
+from utils_helltaker import grid_from_file, check_plan
+
+
+def plan_local(infos, budget: float = 1.0, fallback: str = "sat", seed: int = None):
+    """
+    :param infos: dict containing all map data
+    :param budget: time given to the local search (s)
+    :param fallback: "sat", "asp" or None, complete planner used when the local search fails
+    :param seed: seed of the random generator
+    :return: string sequence of instructions (hbgd), None if there is no plan
+    """
+    from utils_local import local_search
+    from utils_trace import phase
+
+    with phase("local_search"):
+        plan = local_search(infos, time_budget=budget, seed=seed)
+
+    if plan is not None or fallback is None:
+        return plan
+
+    if fallback == "asp":
+        from plan_asp import plan_asp
+
+        return plan_asp(infos)
+
+    from plan_sat import plan_sat
+
+    return plan_sat(infos)
+
+
+def main():
+    """
+    Main function of local search solving
+    :return: print sequence of instructions to solve the given problem
+    """
+    import argparse
+    import utils_trace
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("filename", help="level file")
+    parser.add_argument(
+        "--budget", type=float, default=1.0, help="time of the local search (s)"
+    )
+    parser.add_argument(
+        "--fallback",
+        choices=("sat", "asp", "none"),
+        default="sat",
+        help="complete planner used when the local search fails",
+    )
+    parser.add_argument("--seed", type=int, help="seed of the random generator")
+    parser.add_argument("--trace", metavar="FILE", help="write a trace of the phases")
+    parser.add_argument(
+        "--trace-format",
+        choices=utils_trace.FORMATS,
+        default="json",
+        help="trace format",
+    )
+    args = parser.parse_args()
+
+    if args.trace:
+        utils_trace.enable(args.trace, args.trace_format)
+
+    # recovery of the grid and all the information
+    with utils_trace.phase("parse_level"):
+        infos = grid_from_file(args.filename)
+
+    # plan computing
+    fallback = None if args.fallback == "none" else args.fallback
+    plan = plan_local(infos, args.budget, fallback, args.seed)
+
+    # result printing
+    if plan is None:
+        print("[Err] no plan found in", infos["max_steps"], "moves", file=sys.stderr)
+        sys.exit(1)
+    if check_plan(plan):
+        print("[OK]", plan)
+    else:
+        print("[Err]", plan, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
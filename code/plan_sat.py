@@ -6,34 +6,166 @@ Helltaker plan computing using Answer Set Programming (ASP)
 
 import sys
 from utils_helltaker import grid_from_file, check_plan
-from utils_sat import sat_solving, convert_model
 
 
-def plan_sat(infos):
+def plan_sat(
+    infos,
+    template_dir: str = None,
+    solver: str = "pysat",
+    timeout: float = None,
+    binary_position: bool = False,
+):
     """
     :param infos: dict containing all map data
-    :return: string sequence of instructions (hbgd)
+    :param template_dir: directory of the layout templates, to reuse the encoding of the walls
+    :param solver: "pysat", "gophersat" or an external solver of `utils_external.SOLVERS`
+    :param timeout: time limit of an external solver (s)
+    :param binary_position: logarithmic encoding of the position of the hero
+    :return: string sequence of instructions (hbgd), None if there is no plan (see
+        `utils_sat.sat_solving` for the errors of the solver)
     """
-    sat_model = sat_solving(infos, solver="pysat")
+    # the solver module is only imported once a plan is actually requested
+    from utils_sat import sat_solving, convert_model
+
+    if template_dir:
+        from utils_template import sat_solving_template
+
+        sat_model = sat_solving_template(infos, template_dir)
+    else:
+        sat_model = sat_solving(
+            infos, solver=solver, timeout=timeout, binary_position=binary_position
+        )
+
+    if sat_model is None:
+        return None
 
     return convert_model(sat_model)
 
 
+def plans_sat(infos):
+    """
+    :param infos: dict containing all map data
+    :return: iterator over all the plans of at most max_steps moves (hbgd), computed on demand
+    """
+    from utils_sat import sat_enumerate, convert_model
+
+    for sat_model in sat_enumerate(infos):
+        yield convert_model(sat_model)
+
+
 def main():
     """
     Main function of ASP solving
     :return: print sequence of instructions to solve the given problem
     """
-    # recovery the file name from the command line
-    filename = sys.argv[1]
+    import argparse
+    import utils_trace
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("filename", help="level file")
+    parser.add_argument("--solver", default="pysat", help="pysat, gophersat, kissat...")
+    parser.add_argument("--timeout", type=float, help="time limit (s) of the solver")
+    parser.add_argument("--all", action="store_true", help="enumerate all the plans")
+    parser.add_argument(
+        "--optimal", action="store_true", help="search the optimal number of moves"
+    )
+    parser.add_argument(
+        "--processes", type=int, help="horizons solved in parallel (--optimal)"
+    )
+    parser.add_argument(
+        "--maxsat",
+        action="store_true",
+        help="fewest moves then fewest hurts, with the MaxSAT solver RC2",
+    )
+    parser.add_argument(
+        "--binary", action="store_true", help="binary encoding of the hero position"
+    )
+    parser.add_argument(
+        "--landmarks",
+        action="store_true",
+        help="solve key, lock and demoness as legs (else in one go, with deadlines)",
+    )
+    parser.add_argument("--trace", metavar="FILE", help="write a trace of the phases")
+    parser.add_argument(
+        "--trace-format",
+        choices=utils_trace.FORMATS,
+        default="json",
+        help="trace format",
+    )
+    args = parser.parse_args()
+
+    if args.trace:
+        utils_trace.enable(args.trace, args.trace_format)
 
     # recovery of the grid and all the information
-    infos = grid_from_file(filename)
+    with utils_trace.phase("parse_level"):
+        infos = grid_from_file(args.filename)
+
+    if args.all:
+        n_plans = 0
+        for plan in plans_sat(infos):
+            n_plans += 1
+            print("[OK]" if check_plan(plan) else "[Err]", plan)
+        print(n_plans, "plans")
+        sys.exit(0 if n_plans else 1)
+
+    if args.optimal:
+        from utils_sweep import horizon_sweep
 
-    # plan computing
-    plan = plan_sat(infos)
+        result = horizon_sweep(infos, "sat", args.processes)
+        if result is None:
+            print("[Err] no plan in", infos["max_steps"], "moves", file=sys.stderr)
+            sys.exit(1)
+        print("optimal number of moves:", result[0])
+        plan = result[1]
+    elif args.maxsat:
+        from utils_maxsat import sat_optimal
+        from utils_sat import convert_model
+
+        def on_bound(bound):
+            print(f"{bound[0]} bound: {bound[1]} moves", file=sys.stderr)
+
+        result = sat_optimal(infos, on_bound)
+        if result is None:
+            print("[Err] no plan in", infos["max_steps"], "moves", file=sys.stderr)
+            sys.exit(1)
+        print("optimal number of moves:", result[1], "hurts:", result[2])
+        plan = convert_model(result[0])
+    elif args.landmarks:
+        from utils_landmarks import plan_landmarks
+
+        stats = {}
+        plan = plan_landmarks(infos, "sat", stats=stats)
+        print(
+            "landmarks:",
+            stats["landmarks"],
+            "leg solves:",
+            stats["solves"],
+            "monolithic:",
+            stats["monolithic"],
+            file=sys.stderr,
+        )
+    else:
+        # plan computing
+        try:
+            plan = plan_sat(
+                infos,
+                solver=args.solver,
+                timeout=args.timeout,
+                binary_position=args.binary,
+            )
+        except TimeoutError as e:
+            print("[Err] timeout:", e, file=sys.stderr)
+            sys.exit(3)
+        except (ValueError, RuntimeError, FileNotFoundError) as e:
+            # solveur inconnu, non installé ou arrêté sans réponse : ce n'est pas un unsat
+            print("[Err]", e, file=sys.stderr)
+            sys.exit(3)
 
     # result printing
+    if plan is None:
+        print("[Err] no plan in", infos["max_steps"], "moves", file=sys.stderr)
+        sys.exit(1)
     if check_plan(plan):
         print("[OK]", plan)
     else:
@@ -4,68 +4,61 @@ Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
 This module contains the necessary functions to solve the problem in ASP
 """
 import sys
-from time import time
-from typing import List
-import clingo
-from utils_helltaker import grid_from_file, convert_action
+from typing import List, TYPE_CHECKING
+from utils_helltaker import grid_from_file, convert_action, level_coords
+from utils_trace import phase
 
+if TYPE_CHECKING:
+    import clingo
 
-def grid_to_model(data) -> str:
+
+def grid_to_model(data, trap_phase: bool = False, dominance: bool = False) -> str:
     """
     :param data: dict containing all the map data
+    :param trap_phase: model the traps with one global phase instead of one fluent per trap
+    :param dominance: forbid the plans which can be shortened
     :return: ASP description of the problem
     """
     const = f"#const horizon={data.get('max_steps')}.\n"
-    cells = ""
-    hero = ""
-    demonesses = ""
-    key = ""
-    lock = ""
-    spikes = ""
+    coords = level_coords(data)
+
+    def facts(pattern: str, kind: str) -> str:
+        return "".join(pattern.format(i, j) for i, j in coords[kind])
+
+    cells = facts("cell({}, {}).\n", "cells")
+    demonesses = facts("demoness({}, {}).\n", "demonesses")
+    key = facts("key({}, {}).\n", "key")
+    lock = facts("fluent(lock({}, {}), 0).\n", "lock")
+    spikes = facts("fluent(spike({}, {}), 0).\n", "spikes")
+    blocks = facts("fluent(block({}, {}), 0).\n", "blocks")
+    mobs = facts("fluent(mob({}, {}), 0).\n", "mobs")
+    hero = facts("fluent(at({}, {}), 0).\n", "hero")
+    # cases qui terminent aussi le plan (landmarks de utils_landmarks)
+    goal = "".join(f"goal({i}, {j}).\n" for i, j in data.get("goal_cells", ()))
+    # cases par lesquelles passe tout plan, au plus tard au pas donné
+    landmarks = "".join(
+        f"landmark({i}, {j}, {d}).\n" for (i, j), d in data.get("landmarks", ())
+    )
+    # clé déjà ramassée avant le début du plan (état d'une partie en cours)
+    if data.get("have_key"):
+        key += "fluent(have(key), 0).\n"
+
+    # les traps dans l'ordre des cases, safe et unsafe mêlés
+    safe, unsafe = set(coords["traps_safe"]), set(coords["traps_unsafe"])
     traps = ""
-    blocks = ""
-    mobs = ""
-
-    grid = data.get("grid")
-
-    for i in range(data.get("m")):
-        for j in range(data.get("n")):
-            if grid[i][j] != "#":
-                cells += f"cell({i}, {j}).\n"
-
-            if grid[i][j] == "H":
-                hero = f"fluent(at({i}, {j}), 0).\n"
-            elif grid[i][j] == "D":
-                demonesses += f"demoness({i}, {j}).\n"
-            elif grid[i][j] == "K":
-                key += f"key({i}, {j}).\n"
-            elif grid[i][j] == "L":
-                lock += f"fluent(lock({i}, {j}), 0).\n"
-            elif grid[i][j] == "S":
-                spikes += f"fluent(spike({i}, {j}), 0).\n"
-            elif grid[i][j] == "T":
-                traps += f"fluent(trap({i}, {j}), 0, safe).\n"
-            elif grid[i][j] == "U":
-                traps += f"fluent(trap({i}, {j}), 0, unsafe).\n"
-            elif grid[i][j] == "B":
-                blocks += f"fluent(block({i}, {j}), 0).\n"
-            elif grid[i][j] == "M":
-                mobs += f"fluent(mob({i}, {j}), 0).\n"
-            elif grid[i][j] == "O":
-                blocks += f"fluent(block({i}, {j}), 0).\n"
-                spikes += f"fluent(spike({i}, {j}), 0).\n"
-            elif grid[i][j] == "P":
-                blocks += f"fluent(block({i}, {j}), 0).\n"
-                traps += f"fluent(trap({i}, {j}), 0, safe).\n"
-            elif grid[i][j] == "Q":
-                blocks += f"fluent(block({i}, {j}), 0).\n"
-                traps += f"fluent(trap({i}, {j}), 0, unsafe).\n"
+    for i, j in coords["cells"]:
+        if (i, j) in safe:
+            traps += trap_fact(i, j, "safe", trap_phase)
+        elif (i, j) in unsafe:
+            traps += trap_fact(i, j, "unsafe", trap_phase)
 
     return (
         "\n%%% MAP DESCRIPTION\n"
         + const
         + cells
         + demonesses
+        + goal
+        + landmarks
         + key
         + lock
         + spikes
@@ -74,10 +67,55 @@ def grid_to_model(data) -> str:
         + mobs
         + hero
         + RULES
+        + (GOAL_RULES if goal else "")
+        + (LANDMARK_RULES if landmarks else "")
+        + trap_rules(bool(traps), trap_phase)
+        + (dominance_rules(bool(traps), bool(mobs)) if dominance else "")
     )
 
 
-def convert_model(model: List[clingo.Symbol]) -> str:
+def trap_rules(has_traps: bool, trap_phase: bool) -> str:
+    """
+    :param has_traps: the level contains at least one trap
+    :param trap_phase: the traps are modelled with one global phase
+    :return: ASP rules of the traps
+    """
+    if not trap_phase:
+        return TRAP_RULES
+    # sans trap, la phase ne ferait qu'ajouter des atomes
+    return TRAP_PHASE_RULES if has_traps else ""
+
+
+def dominance_rules(has_traps: bool, has_mobs: bool) -> str:
+    """
+    :param has_traps: the level contains at least one trap
+    :param has_mobs: the level contains at least one mob
+    :return: ASP rules forbidding the plans which can be shortened
+    """
+    rules = ""
+    # en attendant, les traps peuvent tuer des mobs : l'aller-retour n'est plus inutile
+    if not (has_traps and has_mobs):
+        rules += REVERSAL_RULES
+    # sans trap, attendre ne sert à rien
+    if not has_traps:
+        rules += FAILED_PUSH_RULES
+    return rules
+
+
+def trap_fact(i: int, j: int, state: str, trap_phase: bool) -> str:
+    """
+    :param i: line of the trap
+    :param j: column of the trap
+    :param state: initial state of the trap (safe or unsafe)
+    :param trap_phase: the traps are modelled with one global phase
+    :return: ASP fact describing the trap
+    """
+    if trap_phase:
+        return f"trap({i}, {j}, {state}).\n"
+    return f"fluent(trap({i}, {j}), 0, {state}).\n"
+
+
+def convert_model(model: List["clingo.Symbol"]) -> str:
     """
     :param model: an ordered list of symbol "do(action, time)"
     :return: corresponding instructions (hbgd)
@@ -89,19 +127,24 @@ def convert_model(model: List[clingo.Symbol]) -> str:
     return plan
 
 
-def call_solver(asp_problem: str, n_models: int = 0) -> List[List[clingo.Symbol]]:
+def call_solver(asp_problem: str, n_models: int = 0, return_stats: bool = False):
     """
     :param asp_problem: a string containing the problem written in ASP
     :param n_models: the number of desired models (0 for all)
-    :return: a list of models
+    :param return_stats: also return the statistics of the grounding and of the solving
+    :return: a list of models (and the statistics if return_stats)
     """
+    import clingo  # loaded on demand, only the solving path needs it
+
     ctl = clingo.Control([f"-n {n_models}"])
-    ctl.add("base", [], asp_problem)
-    ctl.ground([("base", [])])
+    with phase("parse"):
+        ctl.add("base", [], asp_problem)
+    with phase("ground"):
+        ctl.ground([("base", [])])
 
     models = []
 
-    with ctl.solve(yield_=True) as handle:
+    with phase("solve"), ctl.solve(yield_=True) as handle:
         for model in handle:
             actions = []
             for atom in model.symbols(atoms=True):
@@ -111,9 +154,68 @@ def call_solver(asp_problem: str, n_models: int = 0) -> List[List[clingo.Symbol]
             actions.sort(key=lambda a: a.arguments[1].number)
             models.append(actions)
 
+    if return_stats:
+        return models, solver_stats(ctl)
     return models
 
 
+def solver_stats(ctl: "clingo.Control") -> dict:
+    """
+    :param ctl: clingo control object after a solving
+    :return: statistics of the grounding and of the solving
+    """
+    stats = ctl.statistics
+    lp = stats["problem"]["lp"]
+    solvers = stats["solving"]["solvers"]
+    summary = stats["summary"]
+    return {
+        "engine": "asp",
+        "atoms": int(lp["atoms"]),
+        "rules": int(lp["rules"]),
+        "choices": int(solvers["choices"]),
+        "conflicts": int(solvers["conflicts"]),
+        "models": int(summary["models"]["enumerated"]),
+        "solve_s": summary["times"]["solve"],
+        "satisfiable": summary["models"]["enumerated"] > 0,
+    }
+
+
+def count_plans(data, trap_phase: bool = False) -> dict:
+    """
+    :param data: dict containing all the map data
+    :param trap_phase: model the traps with one global phase instead of one fluent per trap
+    :return: number of distinct plans (projected on the direction of each step) and timing
+    """
+    import clingo
+    from time import perf_counter
+
+    start = perf_counter()
+    # les modèles sont seulement comptés par clingo, aucun n'est remonté en Python
+    ctl = clingo.Control(["--models=0", "--project=project", "--warn=none"])
+    ctl.add("base", [], grid_to_model(data, trap_phase) + PROJECTION_RULES)
+    ctl.ground([("base", [])])
+    grounded = perf_counter()
+    result = ctl.solve()
+    solved = perf_counter()
+
+    return {
+        "plans": int(ctl.statistics["summary"]["models"]["enumerated"]),
+        "exhausted": result.exhausted,
+        "ground_s": grounded - start,
+        "solve_s": solved - grounded,
+    }
+
+
+PROJECTION_RULES = """
+%%% PROJECTION: direction of each step (hurt and nop have none)
+direction(up, u; push_block_up, u; push_mob_up, u).
+direction(down, d; push_block_down, d; push_mob_down, d).
+direction(left, l; push_block_left, l; push_mob_left, l).
+direction(right, r; push_block_right, r; push_mob_right, r).
+dir(T, D) :- do(A, T), direction(A, D).
+#project dir/2.
+"""
+
 RULES = """
 step(0..horizon-1).
 
@@ -275,13 +377,6 @@ fluent(have(key), T) :- fluent(at(X, Y), T), key(X, Y).
 removed(lock(X, Y), T) :- fluent(at(X, Y), T), fluent(lock(X, Y), T).
 
 %%% ACTION: hurt
-% generation
-fluent(spike(X, Y), T) :- fluent(trap(X, Y), T, unsafe). % unsafe trap is equivalent to spike
-removed(spike(X, Y), T) :- fluent(trap(X, Y), T, unsafe). % prevent non-desired apparition of spike
-fluent(trap(X, Y), T+1, safe) :- fluent(trap(X, Y), T, unsafe), do(A, T), A != hurt. % safe trap become unsafe if action different from hurt
-fluent(trap(X, Y), T+1, unsafe) :- fluent(trap(X, Y), T, safe), do(A, T), A != hurt. % unsafe trap become safe if action different from hurt
-fluent(trap(X, Y), T+1, unsafe) :- fluent(trap(X, Y), T, unsafe), do(A, T), A = hurt. % unsafe trap stay unsafe if hurt
-fluent(trap(X, Y), T+1, safe) :- fluent(trap(X, Y), T, safe), do(A, T), A = hurt. % safe trap stay safe if hurt
 % precondition
 :- fluent(at(X, Y), T), fluent(spike(X, Y), T), not do(hurt, T-1), not do(hurt, T). % forced to hurt if on spike and not hurt the turn before
 :- do(hurt, T-1), do(hurt, T). % can't hurt two turn in a row
@@ -293,12 +388,65 @@ fluent(F, T+1) :- fluent(F, T), T+1 < horizon, not removed(F, T).
 #show do/2.
 """
 
+GOAL_RULES = """
+%%% OBJECTIVE: GOAL CELLS
+achieved(T) :- fluent(at(X, Y), T), goal(X, Y).
+"""
+
+LANDMARK_RULES = """
+%%% LANDMARKS: cells reached at the latest at a given step
+passed(X, Y) :- landmark(X, Y, D), fluent(at(X, Y), T), T <= D.
+:- landmark(X, Y, _), not passed(X, Y).
+"""
+
+REVERSAL_RULES = """
+%%% DOMINANCE: no immediate reversal (except to take the key or open the lock)
+#defined key/2.
+opposite(up, down). opposite(down, up). opposite(left, right). opposite(right, left).
+:- do(A, T), do(B, T+1), opposite(A, B), fluent(at(X, Y), T+1),
+    not key(X, Y), not fluent(lock(X, Y), 0).
+"""
+
+FAILED_PUSH_RULES = """
+%%% DOMINANCE: without traps, a block push which fails is a useless wait
+:- do(push_block_up, T), fluent(at(X, Y), T), not removed(block(X-1, Y), T).
+:- do(push_block_down, T), fluent(at(X, Y), T), not removed(block(X+1, Y), T).
+:- do(push_block_left, T), fluent(at(X, Y), T), not removed(block(X, Y-1), T).
+:- do(push_block_right, T), fluent(at(X, Y), T), not removed(block(X, Y+1), T).
+"""
+
+TRAP_RULES = """
+%%% TRAPS
+% generation
+fluent(spike(X, Y), T) :- fluent(trap(X, Y), T, unsafe). % unsafe trap is equivalent to spike
+removed(spike(X, Y), T) :- fluent(trap(X, Y), T, unsafe). % prevent non-desired apparition of spike
+fluent(trap(X, Y), T+1, safe) :- fluent(trap(X, Y), T, unsafe), do(A, T), A != hurt. % safe trap become unsafe if action different from hurt
+fluent(trap(X, Y), T+1, unsafe) :- fluent(trap(X, Y), T, safe), do(A, T), A != hurt. % unsafe trap become safe if action different from hurt
+fluent(trap(X, Y), T+1, unsafe) :- fluent(trap(X, Y), T, unsafe), do(A, T), A = hurt. % unsafe trap stay unsafe if hurt
+fluent(trap(X, Y), T+1, safe) :- fluent(trap(X, Y), T, safe), do(A, T), A = hurt. % safe trap stay safe if hurt
+"""
+
+TRAP_PHASE_RULES = """
+%%% TRAPS (global phase)
+% all the traps switch together unless the action is hurt
+phase(0, initial).
+phase(T+1, switched) :- phase(T, initial), do(A, T), A != hurt.
+phase(T+1, initial) :- phase(T, switched), do(A, T), A != hurt.
+phase(T+1, P) :- phase(T, P), do(hurt, T).
+% a trap is a spike when it is unsafe in the current phase
+fluent(spike(X, Y), T) :- trap(X, Y, unsafe), phase(T, initial).
+fluent(spike(X, Y), T) :- trap(X, Y, safe), phase(T, switched).
+removed(spike(X, Y), T) :- trap(X, Y, _), phase(T, _). % spikes of traps are never kept by the frame
+"""
+
 
 def test():
     """
     Test function of ASP solving
     Run: python3 utils_asp.py /./levels/level1.txt
     """
+    from time import time
+
     start = time()
     filename = sys.argv[1]
     infos = grid_from_file(filename)
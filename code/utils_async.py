@@ -0,0 +1,192 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module gives asyncio counterparts of `plan_asp` and `plan_sat`, for services awaiting many
+solves at once.
+
+The encoding (grounding for ASP, clauses for SAT) runs in a thread of the default executor and
+the solving never blocks the event loop: ASP uses the asynchronous solve handle of clingo, SAT
+runs pysat `solve_limited` in a thread which can be interrupted. Each solve is an async
+generator of events (dicts):
+    {"event": "grounded" or "encoded", ...}  sizes of the problem
+    {"event": "model", "plan": ...}           each plan found
+    {"event": "done", "plan": ...}            end of the solving (plan None if there is none)
+Cancelling the task (or closing the generator) stops the solver itself. The encoding can not
+be interrupted: it ends in its thread and its result is dropped.
+"""
+
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Optional
+
+Event = dict
+
+
+async def asp_events(infos: dict, n_models: int = 1, **options) -> AsyncIterator[Event]:
+    """
+    :param infos: dict containing all map data
+    :param n_models: the number of desired models (0 for all)
+    :param options: options of `grid_to_model` (trap_phase, dominance)
+    :return: async iterator over the events of the solving
+    """
+    import clingo
+    from utils_asp import grid_to_model, convert_model
+    from utils_bounds import is_trivially_infeasible
+
+    if is_trivially_infeasible(infos):
+        yield {"event": "done", "plan": None}
+        return
+
+    loop = asyncio.get_running_loop()
+
+    def ground():
+        ctl = clingo.Control([f"-n {n_models}", "--warn=none"])
+        ctl.add("base", [], grid_to_model(infos, **options))
+        ctl.ground([("base", [])])
+        return ctl
+
+    ctl = await loop.run_in_executor(None, ground)
+    yield {"event": "grounded", "atoms": len(ctl.symbolic_atoms)}
+
+    queue = asyncio.Queue()
+    plans = []
+
+    # les callbacks sont appelés depuis le thread de clingo
+    def on_model(model):
+        actions = [a for a in model.symbols(atoms=True) if a.match("do", 2)]
+        actions.sort(key=lambda a: a.arguments[1].number)
+        plans.append(convert_model(actions))
+        loop.call_soon_threadsafe(
+            queue.put_nowait, {"event": "model", "plan": plans[-1]}
+        )
+
+    def on_finish(result):
+        plan = plans[-1] if result.satisfiable else None
+        loop.call_soon_threadsafe(queue.put_nowait, {"event": "done", "plan": plan})
+
+    # en sortant du bloc, la recherche est interrompue (et attendue) si elle tourne encore
+    with ctl.solve(on_model=on_model, on_finish=on_finish, async_=True):
+        finished = False
+        while not finished:
+            event = await queue.get()
+            finished = event["event"] == "done"
+            yield event
+
+
+async def sat_events(
+    infos: dict, solver: str = "g4", **options
+) -> AsyncIterator[Event]:
+    """
+    :param infos: dict containing all map data
+    :param solver: name of a pysat solver supporting interrupts (g4, g3, m22, cd19...)
+    :param options: options of `level_data_to_clauses` (invariants, stop_at_goal...)
+    :return: async iterator over the events of the solving
+    """
+    from pysat.solvers import Solver
+    from utils_sat import level_data_to_clauses, convert_model
+    from utils_bounds import is_trivially_infeasible
+
+    if is_trivially_infeasible(infos):
+        yield {"event": "done", "plan": None}
+        return
+
+    loop = asyncio.get_running_loop()
+
+    def encode():
+        v2n, clauses = level_data_to_clauses(infos, **options)
+        return v2n, clauses.unique()
+
+    v2n, clauses = await loop.run_in_executor(None, encode)
+    yield {"event": "encoded", "vars": len(v2n), "clauses": len(clauses)}
+
+    queue = asyncio.Queue()
+    lock = threading.Lock()
+    state = {"solver": None, "cancelled": False}
+
+    def solve():
+        event = {"event": "done", "plan": None}
+        try:
+            sat_solver = Solver(name=solver, bootstrap_with=clauses)
+            with lock:
+                state["solver"] = sat_solver
+                # annulé pendant le chargement des clauses
+                if state["cancelled"]:
+                    sat_solver.interrupt()
+            if sat_solver.solve_limited(expect_interrupt=True):
+                n2v = {i: v for v, i in v2n.items()}
+                model = sat_solver.get_model()
+                plan = convert_model(
+                    [n2v[i] for i in model if i in n2v and n2v[i][0] == "do"]
+                )
+                loop.call_soon_threadsafe(
+                    queue.put_nowait, {"event": "model", "plan": plan}
+                )
+                event["plan"] = plan
+            with lock:
+                state["solver"] = None
+                sat_solver.delete()
+        except Exception as e:  # transmise au consommateur
+            event = {"event": "error", "error": e}
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    thread = threading.Thread(target=solve, daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while not finished:
+            event = await queue.get()
+            if event["event"] == "error":
+                raise event["error"]
+            finished = event["event"] == "done"
+            yield event
+    finally:
+        if not finished:
+            with lock:
+                state["cancelled"] = True
+                if state["solver"] is not None:
+                    state["solver"].interrupt()
+
+
+async def last_plan(
+    events: AsyncIterator[Event], on_event: Callable[[Event], None] = None
+) -> Optional[str]:
+    """
+    :param events: events of a solving (`asp_events` or `sat_events`)
+    :param on_event: function called with each event
+    :return: plan of the "done" event, None if there is no plan
+    """
+    plan = None
+    try:
+        async for event in events:
+            if on_event is not None:
+                on_event(event)
+            if event["event"] == "done":
+                plan = event["plan"]
+    finally:
+        await events.aclose()  # arrête le solveur si la tâche est annulée
+    return plan
+
+
+async def plan_asp_async(
+    infos: dict, on_event: Callable[[Event], None] = None, **options
+) -> Optional[str]:
+    """
+    :param infos: dict containing all map data
+    :param on_event: function called with each event of the solving
+    :param options: options of `grid_to_model`
+    :return: string sequence of instructions (hbgd), None if there is no plan
+    """
+    return await last_plan(asp_events(infos, **options), on_event)
+
+
+async def plan_sat_async(
+    infos: dict, on_event: Callable[[Event], None] = None, **options
+) -> Optional[str]:
+    """
+    :param infos: dict containing all map data
+    :param on_event: function called with each event of the solving
+    :param options: options of `level_data_to_clauses`
+    :return: string sequence of instructions (hbgd), None if there is no plan
+    """
+    return await last_plan(sat_events(infos, **options), on_event)
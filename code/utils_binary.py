@@ -0,0 +1,162 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module encodes the position of the hero in binary (logarithmic encoding) for SAT.
+
+At each step, the row and the column of the hero are given by ceil(log2) bits each. The moves
+are bit-vector increments and decrements (with carry variables), the other actions keep both
+vectors unchanged. The one-hot variables ("at", t, c) are kept for the rest of the encoding but
+they are channeled to the bits, which replaces the quadratic uniqueness and transition clauses
+of `clauses_successor_from_given_position` by clauses linear in the number of cells.
+"""
+
+from typing import List
+from utils_sat import Clause
+
+# action modifiant chaque coordonnée : (axe, +1 ou -1)
+MOVES = {
+    "up": ("row", -1),
+    "down": ("row", 1),
+    "left": ("col", -1),
+    "right": ("col", 1),
+}
+
+
+def n_bits(size: int) -> int:
+    """
+    :param size: number of values (lines or columns of the map)
+    :return: number of bits needed to write them
+    """
+    return max(1, (size - 1).bit_length())
+
+
+def position_bits(coords: dict) -> dict:
+    """
+    :param coords: dict containing coord of each element of the map
+    :return: number of bits of the row and of the column
+    """
+    return {
+        "row": n_bits(max(i for i, _ in coords["cells"]) + 1),
+        "col": n_bits(max(j for _, j in coords["cells"]) + 1),
+    }
+
+
+def binary_vocabulary(var2n: dict, coords: dict, t_max: int) -> dict:
+    """
+    :param var2n: dict giving the corresponding number for each variable
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :return: var2n extended with the bits of the position and the carries of the moves
+    """
+    new_vars = []
+    for axis, bits in position_bits(coords).items():
+        new_vars += [(axis, t, k) for t in range(t_max + 1) for k in range(bits)]
+        # retenue (+1) ou emprunt (-1) du bit k, pour chaque pas
+        new_vars += [
+            ("carry", t, axis, sign, k)
+            for t in range(t_max)
+            for sign in (1, -1)
+            for k in range(1, bits)
+        ]
+
+    var2n = dict(var2n)
+    for v in new_vars:
+        var2n[v] = len(var2n) + 1
+
+    return var2n
+
+
+def clauses_channeling(var2n: dict, coords: dict, t_max: int) -> List[Clause]:
+    """
+    :param var2n: dict given by `binary_vocabulary`
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :return: clauses linking ("at", t, c) to the bits of the row and of the column
+    """
+    bits = position_bits(coords)
+    clauses = []
+
+    for t in range(t_max + 1):
+        # le héros est toujours sur une case (les murs sont exclus)
+        clauses.append([var2n[("at", t, c)] for c in coords["cells"]])
+
+        for c in coords["cells"]:
+            at = var2n[("at", t, c)]
+            literals = [
+                var2n[(axis, t, k)] if (value >> k) & 1 else -var2n[(axis, t, k)]
+                for axis, value in (("row", c[0]), ("col", c[1]))
+                for k in range(bits[axis])
+            ]
+            # at(t, c) <-> bits égaux aux coordonnées de c
+            clauses += [[-at, x] for x in literals]
+            clauses.append([at] + [-x for x in literals])
+
+    return clauses
+
+
+def clauses_moves(var2n: dict, coords: dict, t_max: int) -> List[Clause]:
+    """
+    :param var2n: dict given by `binary_vocabulary`
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :return: clauses giving the bits at t+1 from the bits at t and the action at t
+    """
+    bits = position_bits(coords)
+    clauses = []
+
+    for t in range(t_max):
+        for axis in ("row", "col"):
+            x = [var2n[(axis, t, k)] for k in range(bits[axis])]
+            y = [var2n[(axis, t + 1, k)] for k in range(bits[axis])]
+            moving = [var2n[("do", t, a)] for a, (ax, _) in MOVES.items() if ax == axis]
+
+            # la coordonnée ne change pas si aucune action ne la modifie
+            for xk, yk in zip(x, y):
+                clauses += [moving + [-xk, yk], moving + [xk, -yk]]
+
+            for a, (ax, sign) in MOVES.items():
+                if ax != axis:
+                    continue
+                do = var2n[("do", t, a)]
+                # carry[k] : retenue entrant dans le bit k, carry[0] = 1
+                carry = [None] + [
+                    var2n[("carry", t, axis, sign, k)] for k in range(1, bits[axis])
+                ]
+
+                for k in range(1, bits[axis]):
+                    # +1 : carry[k] <-> x[k-1] et carry[k-1]
+                    # -1 : carry[k] <-> non x[k-1] et carry[k-1]
+                    xk = x[k - 1] if sign == 1 else -x[k - 1]
+                    if k == 1:
+                        clauses += [[-carry[1], xk], [carry[1], -xk]]
+                    else:
+                        clauses += [
+                            [-carry[k], xk],
+                            [-carry[k], carry[k - 1]],
+                            [carry[k], -xk, -carry[k - 1]],
+                        ]
+
+                # do(t, a) -> y[k] = x[k] xor carry[k]
+                clauses += [[-do, -x[0], -y[0]], [-do, x[0], y[0]]]
+                for k in range(1, bits[axis]):
+                    c = carry[k]
+                    clauses += [
+                        [-do, -x[k], -c, -y[k]],
+                        [-do, x[k], c, -y[k]],
+                        [-do, -x[k], c, y[k]],
+                        [-do, x[k], -c, y[k]],
+                    ]
+
+    return clauses
+
+
+def clauses_hero_binary(var2n: dict, coords: dict, t_max: int) -> List[Clause]:
+    """
+    :param var2n: dict given by `binary_vocabulary`
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :return: all the clauses of the binary position of the hero
+    """
+    return clauses_channeling(var2n, coords, t_max) + clauses_moves(
+        var2n, coords, t_max
+    )
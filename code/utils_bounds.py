@@ -0,0 +1,110 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module computes a lower bound on the length of the plans of a level, from the grid only.
+
+The bound is the length of a shortest path of the hero to a cell next to a demoness, where
+- entering a cell occupied by a block or a mob costs at least one more action (it has to be pushed),
+- entering a spike costs one more action (the forced hurt), unless the demoness is reached.
+When the bound exceeds the max number of moves, the level has no plan and no solver is needed.
+"""
+
+import heapq
+from typing import Optional, Set
+from utils_helltaker import Coord, adjacent, level_coords
+
+
+def shortest_path_cost(
+    coords: dict,
+    start: Coord,
+    goal: Set[Coord],
+    with_obstacles: bool,
+    with_lock: bool,
+    have_key: bool = False,
+) -> Optional[int]:
+    """
+    :param coords: dict containing coord of each element of the map
+    :param start: starting cell of the hero
+    :param goal: cells to reach
+    :param with_obstacles: count the pushes needed to clear the blocks and mobs of the path
+    :param with_lock: the lock can only be crossed once the key has been picked up
+    :param have_key: the key is already picked up at the start
+    :return: minimal cost of a path from start to goal, None if there is none
+    """
+    cells = set(coords["cells"])
+    spikes = set(coords["spikes"])
+    obstacles = set(coords["blocks"]) | set(coords["mobs"])
+    key = coords["key"][0] if coords["key"] else None
+    lock = coords["lock"][0] if coords["lock"] and with_lock else None
+
+    def cost(q: Coord) -> int:
+        c = 1
+        if q in spikes and q not in goal:
+            c += 1
+        if with_obstacles and q in obstacles:
+            c += 1
+        return c
+
+    dist = {(start, have_key): 0}
+    queue = [(0, (start, have_key))]
+    while queue:
+        d, (p, have_key) = heapq.heappop(queue)
+        if p in goal:
+            return d
+        if d > dist[(p, have_key)]:
+            continue
+        for q in adjacent(p):
+            if q not in cells or (q == lock and not have_key):
+                continue
+            state = (q, have_key or q == key)
+            if d + cost(q) < dist.get(state, d + cost(q) + 1):
+                dist[state] = d + cost(q)
+                heapq.heappush(queue, (d + cost(q), state))
+
+    return None
+
+
+def plan_length_lower_bound(data: dict) -> Optional[int]:
+    """
+    :param data: dict containing all level data
+    :return: lower bound on the number of actions of a plan, None if the demoness is unreachable
+    """
+    coords = level_coords(data)
+    if not coords["hero"] or not coords["demonesses"]:
+        return None
+
+    cells = set(coords["cells"])
+    hero = coords["hero"][0]
+    goal = {c for d in coords["demonesses"] for c in adjacent(d) if c in cells}
+    goal |= set(data.get("goal_cells", ()))
+
+    # un chemin peut repasser par les mêmes cases (aller chercher la clé puis revenir) :
+    # les obstacles ne sont comptés qu'une fois, sur un chemin simple
+    have_key = data.get("have_key", False)
+    bounds = [
+        shortest_path_cost(coords, hero, goal, False, True, have_key),
+        shortest_path_cost(coords, hero, goal, with_obstacles=True, with_lock=False),
+    ]
+
+    # si le lock est incontournable, il faut d'abord aller à la clé puis à la demoness
+    if coords["key"] and coords["lock"] and bounds[0] is not None:
+        key = coords["key"][0]
+        unlocked = dict(coords, key=[])
+        if shortest_path_cost(unlocked, hero, goal, False, True) is None:
+            to_key = shortest_path_cost(coords, hero, {key}, True, False)
+            from_key = shortest_path_cost(coords, key, goal, False, True, True)
+            bounds.append(to_key + from_key)
+
+    if None in bounds:
+        return None
+
+    return max(bounds)
+
+
+def is_trivially_infeasible(data: dict) -> bool:
+    """
+    :param data: dict containing all level data
+    :return: True if no plan can fit in the max number of moves of the level
+    """
+    bound = plan_length_lower_bound(data)
+    return bound is None or bound > data["max_steps"]
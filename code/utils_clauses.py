@@ -0,0 +1,152 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module stores clauses in a flat buffer instead of a list of lists.
+
+All the literals are kept in one contiguous `array("i")` (4 bytes per literal) and an array of
+offsets gives the end of each clause, which avoids the cost of a Python list and of Python ints
+for every clause. The clauses are read back as zero-copy `memoryview` slices, which can be given
+directly to pysat, `clauses_to_dimacs` or `utils_cnf`.
+"""
+
+from array import array
+from typing import Iterable, Iterator, List, Tuple
+
+
+class ClauseBuffer:
+    __slots__ = ("literals", "offsets")
+
+    def __init__(self, clauses: Iterable[Iterable[int]] = ()):
+        """
+        :param clauses: initial clauses
+        """
+        self.literals = array("i")
+        # la clause i occupe literals[offsets[i]:offsets[i+1]]
+        self.offsets = array("q", [0])
+        self.extend(clauses)
+
+    @classmethod
+    def from_bytes(cls, literals: memoryview, offsets: memoryview) -> "ClauseBuffer":
+        """
+        :param literals: raw bytes of the literals (int32), as written by `literals.tofile`
+        :param offsets: raw bytes of the offsets (int64, starting with 0)
+        :return: the corresponding buffer, copied in one pass
+        """
+        buffer = cls()
+        buffer.literals.frombytes(literals)
+        buffer.offsets = array("q")
+        buffer.offsets.frombytes(offsets)
+        return buffer
+
+    def append(self, clause: Iterable[int]):
+        """
+        :param clause: clause added at the end of the buffer
+        """
+        self.literals.extend(clause)
+        self.offsets.append(len(self.literals))
+
+    def extend(self, clauses: Iterable[Iterable[int]]):
+        """
+        :param clauses: clauses (or another buffer) added at the end of the buffer
+        """
+        if isinstance(clauses, ClauseBuffer):
+            base = len(self.literals)
+            self.literals.extend(clauses.literals)
+            self.offsets.extend(base + end for end in clauses.offsets[1:])
+            return
+
+        for clause in clauses:
+            self.literals.extend(clause)
+            self.offsets.append(len(self.literals))
+
+    def __iadd__(self, clauses: Iterable[Iterable[int]]) -> "ClauseBuffer":
+        self.extend(clauses)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> memoryview:
+        if i < 0:
+            i += len(self)
+        return memoryview(self.literals)[self.offsets[i] : self.offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        # les vues empêchent de redimensionner le buffer tant qu'elles existent :
+        # elles sont destinées à être consommées aussitôt (solveur, dimacs, dédoublonnage)
+        view = memoryview(self.literals)
+        start = 0
+        for end in self.offsets[1:]:
+            yield view[start:end]
+            start = end
+
+    @property
+    def nbytes(self) -> int:
+        """
+        :return: memory used by the literals and the offsets
+        """
+        literals_size = self.literals.itemsize * len(self.literals)
+        return literals_size + self.offsets.itemsize * len(self.offsets)
+
+    def unique(self) -> "ClauseBuffer":
+        """
+        :return: a new buffer without the repeated clauses (same literals in the same order)
+        """
+        seen = set()
+        buffer = ClauseBuffer()
+        for clause in self:
+            key = clause.tobytes()
+            if key not in seen:
+                seen.add(key)
+                buffer.append(clause)
+        return buffer
+
+    def to_lists(self) -> List[List[int]]:
+        """
+        :return: the clauses as a list of lists
+        """
+        return [clause.tolist() for clause in self]
+
+    def to_shared_memory(self) -> Tuple[str, int, int]:
+        """
+        :return: name of a new shared memory block holding the literals then the offsets,
+            number of literals, number of clauses (the block must be unlinked by its reader)
+        """
+        from multiprocessing.shared_memory import SharedMemory
+
+        literals = memoryview(self.literals).cast("B")
+        offsets = memoryview(self.offsets).cast("B")
+        shm = SharedMemory(create=True, size=max(1, literals.nbytes + offsets.nbytes))
+        shm.buf[: literals.nbytes] = literals
+        shm.buf[literals.nbytes : literals.nbytes + offsets.nbytes] = offsets
+        name = shm.name
+        shm.close()
+        return name, len(self.literals), len(self)
+
+    def extend_from_shared_memory(self, name: str, n_literals: int, n_clauses: int):
+        """
+        :param name: shared memory block written by `to_shared_memory` (unlinked after reading)
+        :param n_literals: number of literals of the block
+        :param n_clauses: number of clauses of the block
+        """
+        from multiprocessing.shared_memory import SharedMemory
+
+        shm = SharedMemory(name=name)
+        try:
+            size = self.literals.itemsize * n_literals
+            offsets = array("q")
+            with shm.buf[:size] as view:
+                base = len(self.literals)
+                self.literals.frombytes(view)
+            with shm.buf[size : size + offsets.itemsize * (n_clauses + 1)] as view:
+                offsets.frombytes(view)
+            self.offsets.extend(base + end for end in offsets[1:])
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def add_to_solver(self, solver):
+        """
+        :param solver: pysat solver receiving all the clauses
+        """
+        solver.append_formula(self)
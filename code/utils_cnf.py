@@ -0,0 +1,152 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module simplifies a CNF before giving it to a SAT solver.
+
+The encoding pins many variables with unit clauses (initial state, cells which are never spikes...).
+The simplification propagates these units, removes the satisfied clauses and the false literals,
+removes the subsumed clauses and renumbers the remaining variables compactly. The models of the
+simplified formula are translated back to the original numbering with `expand_model`.
+"""
+
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils_sat import Clause
+
+
+def propagate_units(
+    clauses: List[Clause],
+) -> Optional[Tuple[List[Clause], Dict[int, bool]]]:
+    """
+    :param clauses: list of clauses (without duplicate literals nor tautologies)
+    :return: the remaining clauses and the fixed variables, None if a conflict is found
+    """
+    occurrences: Dict[int, List[int]] = {}
+    for i, clause in enumerate(clauses):
+        for x in clause:
+            occurrences.setdefault(x, []).append(i)
+
+    fixed: Dict[int, bool] = {}
+    satisfied = [False] * len(clauses)
+    queue = [c[0] for c in clauses if len(c) == 1]
+
+    while queue:
+        x = queue.pop()
+        if abs(x) in fixed:
+            if fixed[abs(x)] != (x > 0):
+                return None
+            continue
+        fixed[abs(x)] = x > 0
+
+        for i in occurrences.get(x, ()):
+            satisfied[i] = True
+        for i in occurrences.get(-x, ()):
+            if satisfied[i]:
+                continue
+            free = []
+            for y in clauses[i]:
+                value = fixed.get(abs(y))
+                if value is None:
+                    free.append(y)
+                elif value == (y > 0):
+                    satisfied[i] = True
+                    break
+            else:
+                if not free:
+                    return None
+                if len(free) == 1:
+                    queue.append(free[0])
+
+    remaining = [
+        [y for y in clause if abs(y) not in fixed]
+        for i, clause in enumerate(clauses)
+        if not satisfied[i]
+    ]
+
+    return remaining, fixed
+
+
+def remove_subsumed(clauses: List[Clause], max_size: int = 4) -> List[Clause]:
+    """
+    :param clauses: list of clauses
+    :param max_size: maximal length of the subsuming clauses looked for
+    :return: the clauses which are not subsumed by (do not contain) another clause
+    """
+    sets = {frozenset(c) for c in clauses}
+
+    # une clause est subsumée si l'un de ses sous-ensembles stricts est une clause :
+    # les sous-ensembles sont énumérés jusqu'à max_size littéraux, ce qui reste linéaire
+    # alors que les listes d'occurrences des littéraux fréquents sont très longues
+    kept = []
+    for clause in sets:
+        literals = sorted(clause)
+        subsumed = False
+        for size in range(1, min(max_size, len(literals) - 1) + 1):
+            if any(frozenset(sub) in sets for sub in combinations(literals, size)):
+                subsumed = True
+                break
+        if not subsumed:
+            kept.append(sorted(clause, key=abs))
+
+    return kept
+
+
+def simplify(
+    clauses: Iterable[Clause], numvar: int
+) -> Optional[Tuple[List[Clause], dict]]:
+    """
+    :param clauses: clauses of the problem
+    :param numvar: number of variables
+    :return: the simplified clauses and the mapping needed to decode the models
+        (None if the formula is found unsatisfiable)
+    """
+    # suppression des littéraux répétés et des tautologies
+    normalized = []
+    for clause in {frozenset(c) for c in clauses}:
+        if not any(-x in clause for x in clause):
+            normalized.append(list(clause))
+    n_clauses = len(normalized)
+
+    propagated = propagate_units(normalized)
+    if propagated is None:
+        return None
+    remaining, fixed = propagated
+    remaining = remove_subsumed(remaining)
+
+    # renumérotation compacte des variables restantes
+    old2new: Dict[int, int] = {}
+    for clause in remaining:
+        for x in clause:
+            if abs(x) not in old2new:
+                old2new[abs(x)] = len(old2new) + 1
+    new_clauses = [
+        [old2new[x] if x > 0 else -old2new[-x] for x in clause] for clause in remaining
+    ]
+
+    mapping = {
+        "numvar": numvar,
+        "fixed": fixed,
+        "new2old": {n: o for o, n in old2new.items()},
+        "stats": {
+            "clauses_before": n_clauses,
+            "clauses_after": len(new_clauses),
+            "vars_before": numvar,
+            "vars_after": len(old2new),
+            "fixed": len(fixed),
+        },
+    }
+
+    return new_clauses, mapping
+
+
+def expand_model(model: List[int], mapping: dict) -> List[int]:
+    """
+    :param model: model of the simplified formula
+    :param mapping: mapping given by `simplify`
+    :return: model of the original formula (the unconstrained variables are false)
+    """
+    values = {v: value for v, value in mapping["fixed"].items()}
+    for x in model:
+        values[mapping["new2old"][abs(x)]] = x > 0
+
+    return [v if values.get(v, False) else -v for v in range(1, mapping["numvar"] + 1)]
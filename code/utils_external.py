@@ -0,0 +1,185 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module drives external DIMACS SAT solvers (gophersat, kissat, cadical, minisat...).
+
+The CNF is streamed into the standard input of the solver by a writer thread, while the output
+is parsed line by line: the status comes from the "s" line and the model from the "v" lines,
+which may be split over many lines. A timeout kills the solver cleanly. Solvers which can not
+read their standard input (gophersat) or write their model in a file (minisat) are given
+temporary files instead, as described by their entry in SOLVERS.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Iterable, Iterator, List, Optional, Tuple
+from utils_sat import Clause
+
+# configuration of each binary
+#   cmd: command line, "{cnf}" and "{out}" are replaced by temporary files when used
+#   stdin: the CNF can be read on the standard input
+#   output: "dimacs" for the s/v lines of the competition format, "minisat" for a result file
+SOLVERS = {
+    "gophersat": {"cmd": ["gophersat", "{cnf}"], "stdin": False, "output": "dimacs"},
+    "kissat": {"cmd": ["kissat", "-q"], "stdin": True, "output": "dimacs"},
+    "cadical": {"cmd": ["cadical", "-q"], "stdin": True, "output": "dimacs"},
+    "minisat": {
+        "cmd": ["minisat", "-verb=0", "{cnf}", "{out}"],
+        "stdin": False,
+        "output": "minisat",
+    },
+}
+
+CHUNK = 1 << 16  # nombre d'octets envoyés au solveur à chaque écriture
+
+
+def find_binary(name: str) -> Optional[str]:
+    """
+    :param name: name of a solver of SOLVERS
+    :return: path of its binary (the current directory first, like ./gophersat), None if absent
+    """
+    local = os.path.join(".", SOLVERS[name]["cmd"][0])
+    if os.path.isfile(local) and os.access(local, os.X_OK):
+        return local
+    return shutil.which(SOLVERS[name]["cmd"][0])
+
+
+def available_solvers() -> List[str]:
+    """
+    :return: names of the solvers of SOLVERS installed on this host
+    """
+    return [name for name in SOLVERS if find_binary(name) is not None]
+
+
+def dimacs_chunks(clauses: Iterable[Clause], numvar: int) -> Iterator[bytes]:
+    """
+    :param clauses: clauses of the problem (their number must be known, list or ClauseBuffer)
+    :param numvar: number of variables
+    :return: the DIMACS text, by chunks of about CHUNK bytes
+    """
+    lines = [f"p cnf {numvar} {len(clauses)}\n"]
+    size = 0
+    for clause in clauses:
+        line = " ".join(map(str, clause)) + " 0\n"
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK:
+            yield "".join(lines).encode("ascii")
+            lines, size = [], 0
+    yield "".join(lines).encode("ascii")
+
+
+def parse_output(lines: Iterable[str]) -> Tuple[Optional[bool], List[int]]:
+    """
+    :param lines: output of the solver, in the competition format (s and v lines)
+    :return: Sat (True, False or None if unknown), Model (list)
+    """
+    sat = None
+    model = []
+    for line in lines:
+        if line.startswith("s "):
+            status = line[2:].strip()
+            if status == "SATISFIABLE":
+                sat = True
+            elif status == "UNSATISFIABLE":
+                sat = False
+        elif line.startswith("v "):
+            model.extend(int(x) for x in line[2:].split() if x != "0")
+
+    return sat, model if sat else []
+
+
+def parse_minisat_result(filename: str) -> Tuple[Optional[bool], List[int]]:
+    """
+    :param filename: result file written by minisat ("SAT" then the model, or "UNSAT")
+    :return: Sat (True, False or None if unknown), Model (list)
+    """
+    with open(filename, encoding="ascii") as f:
+        status = f.readline().strip()
+        if status == "SAT":
+            return True, [int(x) for x in f.read().split() if x != "0"]
+    return (False if status == "UNSAT" else None), []
+
+
+def exec_external(
+    clauses: Iterable[Clause],
+    numvar: int,
+    solver: str = "kissat",
+    timeout: float = None,
+    cmd: List[str] = None,
+) -> Tuple[Optional[bool], List[int]]:
+    """
+    :param clauses: clauses of the problem
+    :param numvar: number of variables
+    :param solver: name of the solver configuration in SOLVERS
+    :param timeout: time limit (s), the solver is killed when it is reached
+    :param cmd: command line replacing the one of the configuration
+    :return: Sat (True, False or None if unknown or timeout), Model (list)
+    """
+    config = SOLVERS[solver]
+    if cmd is None:
+        binary = find_binary(solver)
+        if binary is None:
+            raise FileNotFoundError(f"{solver} is not installed")
+        cmd = [binary] + config["cmd"][1:]
+
+    tmpdir = tempfile.mkdtemp(prefix="helltaker_")
+    cnf_file = os.path.join(tmpdir, "problem.cnf")
+    out_file = os.path.join(tmpdir, "result.txt")
+    try:
+        if not config["stdin"]:
+            with open(cnf_file, "wb") as f:
+                for chunk in dimacs_chunks(clauses, numvar):
+                    f.write(chunk)
+        args = [a.replace("{cnf}", cnf_file).replace("{out}", out_file) for a in cmd]
+
+        proc = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE if config["stdin"] else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+        def write_cnf():
+            try:
+                for chunk in dimacs_chunks(clauses, numvar):
+                    proc.stdin.write(chunk)
+                proc.stdin.close()
+            except (BrokenPipeError, ValueError, OSError):
+                pass  # le solveur s'est arrêté (ou a été tué) avant la fin de la cnf
+
+        writer = None
+        if config["stdin"]:
+            writer = threading.Thread(target=write_cnf, daemon=True)
+            writer.start()
+
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, proc.kill)
+            timer.start()
+
+        try:
+            lines = (line.decode("ascii", "replace") for line in proc.stdout)
+            sat, model = parse_output(lines)
+            proc.wait()
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+            if writer is not None:
+                writer.join()
+
+        if config["output"] == "minisat":
+            if proc.returncode < 0 or not os.path.exists(out_file):
+                return None, []
+            return parse_minisat_result(out_file)
+
+        return sat, model
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
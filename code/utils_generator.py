@@ -0,0 +1,166 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+Seeded procedural generation of solvable Helltaker levels.
+
+Every generated level is confirmed by a reference solve (exact search of `utils_simulation`),
+the max number of moves of the level is the length of the shortest plan unless a horizon is given.
+Note that the SAT encoding looks for plans of exactly `max_steps` actions: with a horizon larger
+than the shortest plan, a level can be unsatisfiable for SAT while being solvable in ASP.
+"""
+
+import random
+import sys
+from typing import List, Optional
+from utils_simulation import DIRECTIONS, bfs_plan
+
+
+def random_grid(
+    rng: random.Random,
+    m: int,
+    n: int,
+    blocks: int = 0,
+    mobs: int = 0,
+    spikes: int = 0,
+    traps: int = 0,
+    keys: int = 0,
+    wall_density: float = 0.15,
+) -> Optional[List[List[str]]]:
+    """
+    :param rng: random generator
+    :param m: number of lines (outer walls included)
+    :param n: number of columns (outer walls included)
+    :param blocks: number of blocks
+    :param mobs: number of mobs
+    :param spikes: number of spikes
+    :param traps: number of traps
+    :param keys: 1 to add a key and a lock, 0 otherwise
+    :param wall_density: proportion of inner walls
+    :return: a random grid, None if there is not enough room for all the elements
+    """
+    grid = [
+        ["#" if i in (0, m - 1) or j in (0, n - 1) else " " for j in range(n)]
+        for i in range(m)
+    ]
+    inner = [(i, j) for i in range(1, m - 1) for j in range(1, n - 1)]
+    rng.shuffle(inner)
+
+    n_walls = int(wall_density * len(inner))
+    for i, j in inner[:n_walls]:
+        grid[i][j] = "#"
+    free = inner[n_walls:]
+
+    needed = 2 + blocks + mobs + spikes + traps + 2 * keys
+    if len(free) < needed:
+        return None
+
+    hero, demoness = free.pop(), free.pop()
+    grid[hero[0]][hero[1]] = "H"
+    grid[demoness[0]][demoness[1]] = "D"
+
+    # pas de spike ni de trap à côté de la demoness : les deux encodages diffèrent dans ce cas
+    around = {(demoness[0] + di, demoness[1] + dj) for di, dj in DIRECTIONS.values()}
+    floors = [c for c in free if c not in around]
+    others = [c for c in free if c in around]
+    if len(floors) < spikes + traps:
+        return None
+
+    for i, j in floors[:spikes]:
+        grid[i][j] = "S"
+    for i, j in floors[spikes : spikes + traps]:
+        grid[i][j] = rng.choice("TU")
+
+    free = floors[spikes + traps :] + others
+    rng.shuffle(free)
+    for char, count in (("B", blocks), ("M", mobs), ("K", keys), ("L", keys)):
+        for _ in range(count):
+            i, j = free.pop()
+            grid[i][j] = char
+
+    return grid
+
+
+def generate_level(
+    seed: int,
+    m: int = 10,
+    n: int = 10,
+    horizon: int = None,
+    blocks: int = 3,
+    mobs: int = 2,
+    spikes: int = 2,
+    traps: int = 2,
+    keys: int = 0,
+    wall_density: float = 0.15,
+    min_steps: int = None,
+    max_nodes: int = 200000,
+    max_attempts: int = 1000,
+) -> Optional[dict]:
+    """
+    :param seed: seed of the generation, the same seed always gives the same level
+    :param m: number of lines
+    :param n: number of columns
+    :param horizon: max number of moves, the length of the shortest plan if None
+    :param blocks: number of blocks
+    :param mobs: number of mobs
+    :param spikes: number of spikes
+    :param traps: number of traps
+    :param keys: 1 to add a key and a lock, 0 otherwise
+    :param wall_density: proportion of inner walls
+    :param min_steps: minimal length of the shortest plan, (m + n) / 2 if None
+    :param max_nodes: budget of the reference solve
+    :param max_attempts: number of grids drawn before giving up
+    :return: dict containing all map data (format of `grid_from_file`) and the reference "solution"
+    """
+    rng = random.Random(seed)
+    if min_steps is None:
+        min_steps = (m + n) // 2
+
+    for _ in range(max_attempts):
+        grid = random_grid(rng, m, n, blocks, mobs, spikes, traps, keys, wall_density)
+        if grid is None:
+            return None
+
+        infos = {"grid": grid, "title": "", "m": m, "n": n, "max_steps": 0}
+        solution = bfs_plan(infos, max_nodes)
+        if solution is None:
+            continue
+        plan, steps = solution
+        if steps < min_steps or (horizon is not None and steps > horizon):
+            continue
+
+        infos["max_steps"] = steps if horizon is None else horizon
+        infos["title"] = f"Generated level {m}x{n} (seed {seed})"
+        infos["solution"] = plan
+        return infos
+
+    return None
+
+
+def level_to_text(infos: dict) -> str:
+    """
+    :param infos: dict containing all map data
+    :return: the level in the format of the level files
+    """
+    lines = [infos["title"], str(infos["max_steps"])]
+    lines += ["".join(line).rstrip() for line in infos["grid"]]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    """
+    Print a generated level
+    Run: python3 utils_generator.py seed [m n]
+    """
+    seed = int(sys.argv[1])
+    m, n = (int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) > 3 else (10, 10)
+
+    infos = generate_level(seed, m, n)
+    if infos is None:
+        print("no level found", file=sys.stderr)
+        sys.exit(1)
+
+    print(level_to_text(infos), end="")
+
+
+if __name__ == "__main__":
+    main()
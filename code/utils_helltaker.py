@@ -5,9 +5,12 @@ Auteur : Sylvain Lagrue <sylvain.lagrue@hds.utc.fr>
 Ce module contient différentes fonction permettant de lire des fichiers Helltaker au format défini pour le projet et de vérifier des plans.
 """
 
-from pprint import pprint
 import sys
-from typing import List
+from typing import List, Tuple
+
+# alias de type
+Grid = List[List[str]]
+Coord = Tuple[int, int]
 
 
 def complete(m: List[List[str]], n: int):
@@ -112,7 +115,101 @@ def convert_action(action: str) -> str:
     return ""
 
 
+def grid_to_coords_dict(grid: Grid) -> dict:
+    """
+    :param grid: grid of the level
+    :return: dict containing position of each element
+    """
+    coords = {
+        "cells": [],
+        "empty": [],
+        "hero": [],
+        "demonesses": [],
+        "key": [],
+        "lock": [],
+        "spikes": [],
+        "traps_safe": [],
+        "traps_unsafe": [],
+        "blocks": [],
+        "mobs": [],
+    }
+
+    for i, line in enumerate(grid):
+        for j, cell in enumerate(line):
+            if cell != "#":
+                coords["cells"].append((i, j))
+            if cell in ["S", " ", "T", "U", "K"]:
+                coords["empty"].append((i, j))
+            if cell == "H":
+                coords["hero"].append((i, j))
+            elif cell == "D":
+                coords["demonesses"].append((i, j))
+            elif cell == "K":
+                coords["key"].append((i, j))
+            elif cell == "L":
+                coords["lock"].append((i, j))
+            elif cell == "S":
+                coords["spikes"].append((i, j))
+            elif cell == "T":
+                coords["traps_safe"].append((i, j))
+            elif cell == "U":
+                coords["traps_unsafe"].append((i, j))
+            elif cell == "B":
+                coords["blocks"].append((i, j))
+            elif cell == "M":
+                coords["mobs"].append((i, j))
+            elif cell == "O":
+                coords["blocks"].append((i, j))
+                coords["spikes"].append((i, j))
+            elif cell == "P":
+                coords["blocks"].append((i, j))
+                coords["traps_safe"].append((i, j))
+            elif cell == "Q":
+                coords["blocks"].append((i, j))
+                coords["traps_unsafe"].append((i, j))
+
+    return coords
+
+
+def level_coords(data: dict) -> dict:
+    """
+    :param data: dict containing all level data
+    :return: data["coords"] when the level is given by a state of the game (`utils_hint`),
+        the position of each element of the grid otherwise
+    """
+    if "coords" in data:
+        return data["coords"]
+    return grid_to_coords_dict(data["grid"])
+
+
+def adjacent(at: Coord) -> List[Coord]:
+    """
+    :param at: coord
+    :return: list of directly adjacent cells
+    """
+    i, j = at
+    return [(i, j - 1), (i, j + 1), (i - 1, j), (i + 1, j)]
+
+
+def goal_cells(coords: dict) -> List[Coord]:
+    """
+    :param coords: dict containing coord of each element of the map
+    :return: cells ending the plan: next to a demoness, and coords["goal"] if given
+        (landmarks of `utils_landmarks`)
+    """
+    cells = set(coords["cells"])
+    goal = [
+        coord
+        for demoness in coords["demonesses"]
+        for coord in adjacent(demoness)
+        if coord in cells
+    ]
+    return goal + [c for c in coords.get("goal", []) if c not in goal]
+
+
 def test():
+    from pprint import pprint
+
     if len(sys.argv) != 2:
         sys.exit(-1)
 
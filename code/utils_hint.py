@@ -0,0 +1,253 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module gives hints: the rest of a plan from a partially played prefix (udlr).
+
+The prefix is simulated (`utils_simulation`) to get the exact state of the game: position of the
+hero, the blocks and the mobs, phase of the traps, key picked up or not, number of actions done.
+This state is turned into a level of its own (`state_to_infos`), described by the coords of its
+elements instead of a grid (`utils_sat.level_coords`): the traps are swapped when their phase is
+switched, the key is removed and `have_key` is set once it has been picked up, and max_steps is
+the number of moves left. Any engine then solves this level over the remaining horizon only.
+
+The suffixes are cached by level, engine and state, so that the prefixes leading to the same
+state share their solve, and every state along a suffix gets the end of it for free. Every engine
+searches plans of at most the moves left (SAT with `stop_at_goal`, ASP with nop, BFS), so a cached
+suffix answers a state with at least as many moves left as it needs, and a cached failure a state
+with at most as many moves left as when it was proved.
+"""
+
+from time import perf_counter
+from typing import Optional, Tuple
+from utils_helltaker import level_coords
+from utils_simulation import (
+    DIRECTIONS,
+    State,
+    bfs_plan,
+    initial_state,
+    is_goal,
+    is_spike,
+    level_from_infos,
+    step,
+)
+
+# moteurs dont les plans font au plus max_steps actions (le cache en dépend)
+ENGINES = ("sat", "asp", "bfs")
+CACHE_SIZE = 10000  # nombre d'états gardés (les moins récemment utilisés sont oubliés)
+
+
+def play(infos: dict, prefix: str) -> State:
+    """
+    :param infos: dict containing all map data
+    :param prefix: moves already played (udlr)
+    :return: state of the game after the prefix
+    """
+    level = level_from_infos(infos)
+    state = initial_state(infos)
+    for k, direction in enumerate(prefix):
+        if is_goal(level, state):
+            raise ValueError(f"the demoness is reached before move {k} of the prefix")
+        following = step(level, state, direction) if direction in DIRECTIONS else None
+        if following is None:
+            raise ValueError(f"move {k} ({direction}) of the prefix is not allowed")
+        state = following
+    return state
+
+
+def state_to_infos(infos: dict, state: State) -> dict:
+    """
+    :param infos: dict containing all map data
+    :param state: state of the game
+    :return: level starting from this state, with the moves left as max_steps
+    """
+    coords = dict(level_coords(infos))
+    cells = coords["cells"]
+    # dans l'ordre des cases, comme si l'état était lu dans une grille
+    coords["hero"] = [state.hero]
+    coords["blocks"] = [c for c in cells if c in state.blocks]
+    coords["mobs"] = [c for c in cells if c in state.mobs]
+    if state.phase:
+        coords["traps_safe"], coords["traps_unsafe"] = (
+            coords["traps_unsafe"],
+            coords["traps_safe"],
+        )
+    if state.have_key:
+        coords["key"] = []
+
+    occupied = set(coords["blocks"] + coords["mobs"] + coords["lock"])
+    occupied |= set(coords["demonesses"]) | {state.hero}
+    coords["empty"] = [c for c in cells if c not in occupied]
+
+    return dict(
+        infos,
+        coords=coords,
+        have_key=state.have_key,
+        max_steps=infos["max_steps"] - state.steps,
+    )
+
+
+def solve_state(infos: dict, state: State, engine: str = "sat") -> Optional[str]:
+    """
+    :param infos: dict containing all map data
+    :param state: state of the game
+    :param engine: "sat", "asp" or "bfs"
+    :return: moves (udlr) reaching the demoness from the state within max_steps, None if
+        there are none
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {ENGINES}")
+
+    if engine == "bfs":
+        found = bfs_plan(infos, start=state)
+        if found is None or found[1] > infos["max_steps"]:
+            return None
+        return found[0]
+
+    data = state_to_infos(infos, state)
+    if engine == "asp":
+        from plan_asp import plan_asp
+
+        # sur un spike, le hurt déjà compté par la simulation est imposé par ASP au pas 0
+        level = level_from_infos(infos)
+        if is_spike(level, state.hero, state.phase):
+            data["max_steps"] += 1
+        return plan_asp(data)
+
+    from utils_sat import sat_solving, convert_model
+
+    # plans d'au plus max_steps actions, complétés par des nop
+    model = sat_solving(data, solver="pysat", stop_at_goal=True)
+    return None if model is None else convert_model(model)
+
+
+def replay(infos: dict, state: State, suffix: str) -> Optional[list]:
+    """
+    :param infos: dict containing all map data
+    :param state: state of the game
+    :param suffix: moves (udlr)
+    :return: the states along the suffix if it reaches the demoness within max_steps, None
+        otherwise
+    """
+    level = level_from_infos(infos)
+    states = [state]
+    for direction in suffix:
+        if is_goal(level, states[-1]):
+            break
+        following = step(level, states[-1], direction)
+        if following is None:
+            return None
+        states.append(following)
+    if not is_goal(level, states[-1]) or states[-1].steps > infos["max_steps"]:
+        return None
+    return states
+
+
+def level_key(infos: dict) -> Tuple:
+    """
+    :param infos: dict containing all map data (grid or coords)
+    :return: hashable description of the level in the cache
+    """
+    coords = level_coords(infos)
+    return (
+        tuple((kind, tuple(coords[kind])) for kind in sorted(coords)),
+        infos.get("have_key", False),
+        tuple(infos.get("goal_cells", ())),
+    )
+
+
+def cache_key(level: Tuple, engine: str, state: State) -> Tuple:
+    """
+    :param level: description of the level (`level_key`)
+    :param engine: engine of the cached solves
+    :param state: state of the game
+    :return: key of the state in the cache (the state without its steps)
+    """
+    return level, engine, state._replace(steps=0)
+
+
+def cache_get(cache: dict, key: Tuple) -> Optional[dict]:
+    """
+    :param cache: cache of the hints
+    :param key: key of a state
+    :return: entry of the state, marked as the most recently used
+    """
+    entry = cache.pop(key, None)
+    if entry is not None:
+        cache[key] = entry
+    return entry
+
+
+def cache_put(cache: dict, key: Tuple, **entry):
+    """
+    :param cache: cache of the hints
+    :param key: key of a state
+    :param entry: suffix and its number of actions, or moves left proved not enough
+    """
+    cache[key] = dict(cache_get(cache, key) or {}, **entry)
+    while len(cache) > CACHE_SIZE:
+        del cache[next(iter(cache))]
+
+
+def hint(
+    infos: dict,
+    prefix: str,
+    engine: str = "sat",
+    cache: dict = None,
+    stats: dict = None,
+) -> Optional[str]:
+    """
+    :param infos: dict containing all map data
+    :param prefix: moves already played (udlr)
+    :param engine: "sat", "asp" or "bfs", engine solving the remaining horizon
+    :param cache: dict reused between the calls (on the same or different levels)
+    :param stats: dict completed with the state, the moves left, the use of the cache and the time
+    :return: moves (udlr) completing the prefix into a plan, None if there are none
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {ENGINES}")
+
+    begin = perf_counter()
+    state = play(infos, prefix)
+    left = infos["max_steps"] - state.steps
+    cache = {} if cache is None else cache
+    level = level_key(infos)
+    key = cache_key(level, engine, state)
+    entry = cache_get(cache, key) or {}
+
+    if is_goal(level_from_infos(infos), state):
+        suffix, cached = "", True
+    elif left < 0:
+        suffix, cached = None, True
+    elif "suffix" in entry and entry["cost"] <= left:
+        suffix, cached = entry["suffix"], True
+    elif entry.get("unsolvable", -1) >= left:
+        suffix, cached = None, True
+    else:
+        suffix, cached = solve_state(infos, state, engine), False
+        states = None if suffix is None else replay(infos, state, suffix)
+        if suffix is not None and states is None:
+            # suffixe refusé par la simulation : recherche exacte depuis l'état
+            suffix = solve_state(infos, state, "bfs")
+            states = None if suffix is None else replay(infos, state, suffix)
+
+        if states is None:
+            cache_put(cache, key, unsolvable=max(left, entry.get("unsolvable", -1)))
+        else:
+            # la fin du suffixe est une réponse pour chaque état traversé
+            suffix = suffix[: len(states) - 1]
+            end = states[-1].steps
+            for k, s in enumerate(states[:-1]):
+                cost = end - s.steps
+                s_key = cache_key(level, engine, s)
+                known = cache_get(cache, s_key) or {}
+                if "suffix" not in known or cost < known["cost"]:
+                    cache_put(cache, s_key, suffix=suffix[k:], cost=cost)
+
+    if stats is not None:
+        stats.update(
+            state=state,
+            moves_left=left,
+            cached=cached,
+            time_s=perf_counter() - begin,
+        )
+    return suffix
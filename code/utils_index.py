@@ -0,0 +1,133 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module indexes a level once for the clause generators of `utils_sat`.
+
+The cells get dense ids (their order in coords["cells"]), each kind of element (blocks, spikes,
+traps...) a frozenset and a bitmask over these ids, and the geometry is precomputed: the cell
+reached by each action, the cell pushed and its destination for each push, the adjacent cells.
+Cells outside the map (walls, borders) are None in these tables, so the generators never test
+membership in a list of coordinates nor build a dict of successors for each call.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+Coord = Tuple[int, int]
+
+# déplacement de chaque action (les autres actions laissent le héros sur place)
+DELTAS = {
+    "left": (0, -1),
+    "right": (0, 1),
+    "up": (-1, 0),
+    "down": (1, 0),
+}
+
+# direction de chaque push
+PUSHES = {
+    "push_block_left": (0, -1),
+    "push_block_right": (0, 1),
+    "push_block_up": (-1, 0),
+    "push_block_down": (1, 0),
+    "push_mob_left": (0, -1),
+    "push_mob_right": (0, 1),
+    "push_mob_up": (-1, 0),
+    "push_mob_down": (1, 0),
+}
+
+
+class LevelIndex:
+    __slots__ = (
+        "cells",
+        "ids",
+        "cell_set",
+        "sets",
+        "masks",
+        "succ",
+        "push",
+        "adjacent",
+    )
+
+    def __init__(self, coords: dict):
+        """
+        :param coords: dict containing coord of each element of the map
+        """
+        self.cells: List[Coord] = list(coords["cells"])
+        self.ids: Dict[Coord, int] = {c: k for k, c in enumerate(self.cells)}
+        self.cell_set = frozenset(self.cells)
+
+        self.sets = {kind: frozenset(coords[kind]) for kind in coords}
+        self.masks = {kind: self.mask_of(coords[kind]) for kind in coords}
+
+        # succ[c][a] : case atteinte par le move a depuis c (None si hors du plateau),
+        # les autres actions laissent le héros en c (voir target)
+        self.succ: Dict[Coord, Dict[str, Optional[Coord]]] = {}
+        # push[c][a] : (case poussée, destination) depuis c, None si hors du plateau
+        self.push: Dict[Coord, Dict[str, Tuple[Optional[Coord], Optional[Coord]]]] = {}
+        self.adjacent: Dict[Coord, frozenset] = {}
+
+        for i, j in self.cells:
+            self.succ[(i, j)] = {
+                a: self.cell(i + di, j + dj) for a, (di, dj) in DELTAS.items()
+            }
+            self.push[(i, j)] = {
+                a: (self.cell(i + di, j + dj), self.cell(i + 2 * di, j + 2 * dj))
+                for a, (di, dj) in PUSHES.items()
+            }
+            self.adjacent[(i, j)] = frozenset(
+                c for c in self.succ[(i, j)].values() if c is not None
+            )
+
+    def cell(self, i: int, j: int) -> Optional[Coord]:
+        """
+        :param i: line
+        :param j: column
+        :return: the coord (i, j) if it is a cell of the map, None otherwise
+        """
+        return (i, j) if (i, j) in self.cell_set else None
+
+    def mask_of(self, cells) -> int:
+        """
+        :param cells: cells of the map
+        :return: bitmask of their ids
+        """
+        mask = 0
+        for c in cells:
+            if c in self.ids:
+                mask |= 1 << self.ids[c]
+        return mask
+
+    def union(self, *kinds: str) -> int:
+        """
+        :param kinds: kinds of elements (keys of coords)
+        :return: bitmask of the cells containing one of them
+        """
+        mask = 0
+        for kind in kinds:
+            mask |= self.masks[kind]
+        return mask
+
+    def has(self, mask: int, cell: Coord) -> bool:
+        """
+        :param mask: bitmask of cells
+        :param cell: cell of the map
+        :return: the cell is in the mask
+        """
+        return (mask >> self.ids[cell]) & 1 == 1
+
+    def select(self, mask: int, inside: bool = True) -> List[Coord]:
+        """
+        :param mask: bitmask of cells
+        :param inside: False for the cells outside the mask
+        :return: the cells in (or outside) the mask, in the order of the ids
+        """
+        return [c for k, c in enumerate(self.cells) if ((mask >> k) & 1) == inside]
+
+    def target(self, position: Coord, action: str) -> Optional[Coord]:
+        """
+        :param position: position of the hero
+        :param action: any action
+        :return: position of the hero after the action, None if it leaves the map
+        """
+        if action in DELTAS:
+            return self.succ[position][action]
+        return position
@@ -0,0 +1,100 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module infers invariants of a level before solving, to strengthen the SAT encoding.
+
+A relaxed planning graph is expanded from the initial state (no delete effects, blocks and mobs
+do not hinder the hero): the fluents absent from layer t can not be true at time t. Static
+mutexes are added between the hero, the blocks and the mobs, which never share a cell.
+All these clauses are redundant for the actual plans of the level.
+"""
+
+from typing import List, Set
+from utils_sat import Clause, adjacent
+
+
+def planning_graph(coords: dict, t_max: int, have_key: bool = False) -> List[dict]:
+    """
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :param have_key: the key is already picked up at the start
+    :return: for each time step, the sets of cells where the hero, a block or a mob may be
+        and whether the key may have been picked up
+    """
+    cells = set(coords["cells"])
+    lock = set(coords["lock"])
+    forbidden_blocks = lock | set(coords["demonesses"])
+    key = set(coords["key"])
+
+    hero: Set = set(coords["hero"])
+    blocks: Set = set(coords["blocks"])
+    mobs: Set = set(coords["mobs"])
+
+    layers = [{"at": hero, "block": blocks, "mob": mobs, "have_key": have_key}]
+    for _ in range(t_max):
+        new_hero = set(hero)
+        new_blocks = set(blocks)
+        new_mobs = set(mobs)
+        # la clé ramassée sur ce layer ouvre déjà le lock au pas suivant
+        have_key = have_key or bool(key & hero)
+
+        for p in hero:
+            for q in adjacent(p):
+                if q in cells and (q not in lock or have_key):
+                    new_hero.add(q)
+
+        # un objet en o peut être poussé en 2o - p par le héros en p
+        for objects, new_objects, forbidden in (
+            (blocks, new_blocks, forbidden_blocks),
+            (mobs, new_mobs, set()),
+        ):
+            for o in objects:
+                for p in adjacent(o):
+                    if p in hero:
+                        q = (2 * o[0] - p[0], 2 * o[1] - p[1])
+                        if q in cells and q not in forbidden:
+                            new_objects.add(q)
+
+        hero, blocks, mobs = new_hero, new_blocks, new_mobs
+        layers.append(
+            {
+                "at": hero,
+                "block": blocks,
+                "mob": mobs,
+                "have_key": have_key or bool(key & hero),
+            }
+        )
+
+    return layers
+
+
+def clauses_invariants(
+    var2n: dict, coords: dict, t_max: int, have_key: bool = False
+) -> List[Clause]:
+    """
+    :param var2n: dict giving the corresponding number for each variable
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :param have_key: the key is already picked up at the start
+    :return: redundant clauses given by the planning graph and the mutexes
+    """
+    clauses = []
+
+    for t, layer in enumerate(planning_graph(coords, t_max, have_key)):
+        # fluents non atteignables au temps t
+        for fluent in ("at", "block", "mob"):
+            clauses += [
+                [-var2n[(fluent, t, c)]]
+                for c in coords["cells"]
+                if c not in layer[fluent]
+            ]
+        if coords["key"] and coords["lock"] and not layer["have_key"]:
+            clauses.append([-var2n[("have_key", t)]])
+
+        # mutex : le héros, les blocks et les mobs ne partagent jamais une case
+        for f1, f2 in (("block", "mob"), ("at", "block"), ("at", "mob")):
+            clauses += [
+                [-var2n[(f1, t, c)], -var2n[(f2, t, c)]] for c in layer[f1] & layer[f2]
+            ]
+
+    return clauses
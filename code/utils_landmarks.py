@@ -0,0 +1,358 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module solves the levels with a key and a lock by decomposition into legs.
+
+The landmarks are found on the static grid: when the lock closes every path to the demoness
+(relaxed reachability where the blocks that can never be pushed away are walls, as well as the
+dead cells a block has been pushed into), any plan has to reach the key, then open the lock,
+then get next to the demoness. Each leg is a level of its own with a short horizon: the state at
+the end of the previous leg (`utils_hint`), with the landmark as goal (`goal_cells`, the plan
+stops as soon as it is reached).
+
+Each leg is solved once over all the moves it may use, and several of its models are
+enumerated: the shortest sub-plans ending in different states are kept (blocks and mobs
+elsewhere, other phase of the traps...). When a leg has no plan within the moves left, the
+search backtracks to the next sub-plan of the previous leg. The decomposition is incomplete,
+and a short sub-plan may leave the blocks where the rest of the level needs them: once every
+alternative has failed (or after max_solves solves), or at once when the first leg is nearly
+as long as the level, the whole level is solved in one go (monolithic solve), each landmark
+having to be reached before the moves of the legs after it (`deadlines`).
+"""
+
+from itertools import islice
+from typing import Iterator, List, Optional, Set, Tuple
+from utils_bounds import shortest_path_cost
+from utils_helltaker import Coord, adjacent, goal_cells, level_coords
+from utils_hint import state_to_infos
+from utils_simulation import (
+    State,
+    check_solution,
+    initial_state,
+    is_goal,
+    level_from_infos,
+    step,
+)
+
+ENGINES = ("sat", "asp")
+MODELS = 4  # modèles énumérés par leg pour chaque sous-plan gardé
+MAX_LEG_SHARE = 0.75  # part de l'horizon au-delà de laquelle un leg n'est plus court
+
+
+def dead_cells(coords: dict) -> Set[Coord]:
+    """
+    :param coords: dict containing coord of each element of the map
+    :return: cells a block pushed into can never leave (no free cell on both sides, on each
+        axis)
+    """
+    cells = set(coords["cells"]) - set(coords["demonesses"])
+    return {
+        (x, y)
+        for x, y in cells
+        if not ({(x - 1, y), (x + 1, y)} <= cells or {(x, y - 1), (x, y + 1)} <= cells)
+    }
+
+
+def relaxed_reachable(
+    coords: dict, goal: Set[Coord], forbidden: Set[Coord], max_branches: int = 256
+) -> bool:
+    """
+    :param coords: dict containing coord of each element of the map
+    :param goal: cells to reach
+    :param forbidden: cells the hero never enters (the lock without the key)
+    :param max_branches: number of relaxations before giving up (the goal is then reachable)
+    :return: False only if the hero can never reach the goal (over-approximation: a cell
+        holding an object may get free once, and then stays free, except a dead cell once a
+        block has been pushed into it)
+    """
+    cells = set(coords["cells"])
+    blocks, mobs = set(coords["blocks"]), set(coords["mobs"])
+    deadly = set(coords["spikes"] + coords["traps_safe"] + coords["traps_unsafe"])
+    no_block = set(coords["lock"]) | set(coords["demonesses"])
+    dead = dead_cells(coords)
+    seen = set()
+
+    def reach(hero: Set[Coord], free: Set[Coord], walls: Set[Coord]) -> bool:
+        if len(seen) >= max_branches:
+            return True
+        seen.add((frozenset(hero), frozenset(free), frozenset(walls)))
+        hero, free = set(hero), set(free)
+        # poussées d'un block dans une case morte : chacune est une branche
+        pushes = set()
+        queue = [p for p in hero if p not in walls]
+        while queue:
+            p = queue.pop()
+            for q in adjacent(p):
+                if q not in cells or q in forbidden or q in walls:
+                    continue
+                if q not in free:
+                    # l'objet en q peut être poussé en r : un mob meurt s'il ne peut pas bouger
+                    r = (2 * q[0] - p[0], 2 * q[1] - p[1])
+                    if q in blocks and r in dead and r in free and r not in walls:
+                        pushes.add((q, r))
+                    elif q in mobs or (
+                        r in free and r not in no_block and r not in walls
+                    ):
+                        free.add(q)
+                        # les cases voisines de q déjà atteintes peuvent maintenant y entrer
+                        queue += [c for c in adjacent(q) if c in hero]
+                if q in free and q not in hero:
+                    hero.add(q)
+                    queue.append(q)
+        if hero & goal:
+            return True
+
+        # le block poussé ne quitte plus la case morte : elle devient un mur
+        for q, r in pushes:
+            branch = (frozenset(hero), frozenset(free | {q}), frozenset(walls | {r}))
+            if q in free or branch in seen:
+                continue
+            if reach(*branch):
+                return True
+        return False
+
+    # un mob sur un spike ou un trap peut mourir sans être poussé
+    return reach(set(coords["hero"]), (cells - blocks - mobs) | (mobs & deadly), set())
+
+
+def landmarks(infos: dict) -> List[Coord]:
+    """
+    :param infos: dict containing all map data
+    :return: cells every plan has to go through, in order (the key then the lock), empty if
+        the lock does not close every path to the demoness
+    """
+    coords = level_coords(infos)
+    if not (coords["hero"] and coords["key"] and coords["lock"]):
+        return []
+
+    # sans la clé, le lock ne peut jamais être traversé
+    lock = coords["lock"][0]
+    if relaxed_reachable(coords, set(goal_cells(coords)), {lock}):
+        return []
+    return [coords["key"][0], lock]
+
+
+def rest_bounds(infos: dict, marks: List[Coord]) -> List[int]:
+    """
+    :param infos: dict containing all map data
+    :param marks: landmarks of the level
+    :return: for each leg, lower bound on the number of moves of the legs after it
+    """
+    coords = dict(level_coords(infos), key=[])
+    goals = [{c} for c in marks[1:]] + [set(goal_cells(coords))]
+    legs = [
+        shortest_path_cost(coords, a, g, False, False) or 0
+        for a, g in zip(marks, goals)
+    ]
+
+    bounds = [0]
+    for cost in reversed(legs):
+        bounds.insert(0, bounds[0] + cost)
+    return bounds
+
+
+def deadlines(infos: dict, marks: List[Coord]) -> List[Tuple[Coord, int]]:
+    """
+    :param infos: dict containing all map data
+    :param marks: landmarks of the level
+    :return: each landmark with the last step at which a plan can reach it (data["landmarks"]
+        of `utils_sat.level_data_to_clauses` and `utils_asp.grid_to_model`)
+    """
+    rest = rest_bounds(infos, marks)
+    return [(mark, infos["max_steps"] - r) for mark, r in zip(marks, rest)]
+
+
+def leg_plans(
+    infos: dict,
+    state: State,
+    goal: Optional[Coord],
+    horizon: int,
+    engine: str,
+    limit: int,
+) -> Iterator[str]:
+    """
+    :param infos: dict containing all map data
+    :param state: state at the start of the leg
+    :param goal: landmark ending the leg, None for the demoness
+    :param horizon: max number of actions of the leg
+    :param engine: "sat" or "asp"
+    :param limit: max number of sub-plans
+    :return: iterator over distinct sub-plans (udlr) reaching the goal within the horizon
+    """
+    # les legs partent du départ, de la clé ou du lock : jamais d'un spike (voir utils_hint)
+    data = state_to_infos(infos, state)
+    data["max_steps"] = horizon
+    if goal is not None:
+        data["goal_cells"] = [goal]
+
+    if engine == "asp":
+        from utils_asp import grid_to_model, call_solver, convert_model
+        from utils_bounds import is_trivially_infeasible
+
+        if is_trivially_infeasible(data):
+            return
+        for model in call_solver(grid_to_model(data), n_models=limit):
+            yield convert_model(model)
+        return
+
+    from utils_sat import sat_enumerate, convert_model
+
+    for model in islice(sat_enumerate(data), limit):
+        yield convert_model(model)
+
+
+def follow(
+    level: dict, state: State, plan: str, goal: Optional[Coord]
+) -> Optional[State]:
+    """
+    :param level: static description of the level
+    :param state: state at the start of the leg
+    :param plan: sub-plan (udlr)
+    :param goal: landmark ending the leg, None for the demoness
+    :return: state when the goal (or the demoness) is reached, None if it is not
+    """
+    for direction in plan:
+        if state.hero == goal or is_goal(level, state):
+            break
+        state = step(level, state, direction)
+        if state is None:
+            return None
+    if state.hero == goal or is_goal(level, state):
+        return state
+    return None
+
+
+def leg_ends(
+    infos: dict,
+    level: dict,
+    state: State,
+    goal: Optional[Coord],
+    moves: int,
+    engine: str,
+    alternatives: int,
+    stats: dict,
+) -> List[Tuple[str, State]]:
+    """
+    :param infos: dict containing all map data
+    :param level: static description of the level
+    :param state: state at the start of the leg
+    :param goal: landmark ending the leg, None for the demoness
+    :param moves: max number of actions of the leg
+    :param engine: "sat" or "asp"
+    :param alternatives: max number of sub-plans ending in different states
+    :param stats: dict counting the solves, with the max number of solves
+    :return: the sub-plans and the states they end in, shortest first
+    """
+    if stats["solves"] >= stats["max_solves"]:
+        return []
+    stats["solves"] += 1
+
+    # un seul solve (plans d'au plus moves actions) dont on énumère les modèles
+    shortest = {}
+    limit = 1 if goal is None else MODELS * alternatives
+    for plan in leg_plans(infos, state, goal, moves, engine, limit):
+        end = follow(level, state, plan, goal)
+        if end is None or end.steps - state.steps > moves:
+            continue
+        # le plus court des sous-plans menant au même état
+        key = end._replace(steps=0)
+        if key not in shortest or end.steps < shortest[key][1].steps:
+            shortest[key] = (plan, end)
+
+    ends = sorted(shortest.values(), key=lambda found: found[1].steps)
+    return ends[:alternatives]
+
+
+def decompose(
+    infos: dict,
+    engine: str = "sat",
+    alternatives: int = 3,
+    max_solves: int = 30,
+    stats: dict = None,
+) -> Optional[str]:
+    """
+    :param infos: dict containing all map data
+    :param engine: "sat" or "asp", engine of the legs
+    :param alternatives: sub-plans tried for each leg before backtracking
+    :param max_solves: number of leg solves before giving up
+    :param stats: dict completed with the landmarks, the number of solves and of backtracks
+    :return: a plan (udlr) chaining the legs, None if the level has no landmark or if the
+        decomposition failed
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}, expected one of {ENGINES}")
+
+    stats = {} if stats is None else stats
+    marks = landmarks(infos)
+    stats.update(landmarks=marks, solves=0, max_solves=max_solves, backtracks=0)
+    if not marks:
+        return None
+
+    level = level_from_infos(infos)
+    legs = marks + [None]
+    rest = rest_bounds(infos, marks)
+    # un premier leg presque aussi long que le niveau ne raccourcit pas l'horizon
+    if infos["max_steps"] - rest[0] > MAX_LEG_SHARE * infos["max_steps"]:
+        return None
+
+    def search(k: int, state: State) -> Optional[str]:
+        if is_goal(level, state):
+            return ""
+        moves = infos["max_steps"] - state.steps - rest[k]
+        if moves < 0:
+            return None
+        for plan, end in leg_ends(
+            infos, level, state, legs[k], moves, engine, alternatives, stats
+        ):
+            found = search(k + 1, end)
+            if found is not None:
+                return plan + found
+            stats["backtracks"] += 1
+        return None
+
+    plan = search(0, initial_state(infos))
+    if plan is None or not check_solution(infos, plan):
+        return None
+    return plan
+
+
+def plan_landmarks(
+    infos: dict,
+    engine: str = "sat",
+    alternatives: int = 3,
+    max_solves: int = 30,
+    stats: dict = None,
+) -> Optional[str]:
+    """
+    :param infos: dict containing all map data
+    :param engine: "sat" or "asp"
+    :param alternatives: sub-plans tried for each leg before backtracking
+    :param max_solves: number of leg solves before the monolithic solve
+    :param stats: dict completed with the statistics of the decomposition and the fallback
+    :return: string sequence of instructions (udlr), None if there is no plan
+    """
+    stats = {} if stats is None else stats
+    plan = decompose(infos, engine, alternatives, max_solves, stats)
+    stats["monolithic"] = plan is None
+    if plan is not None:
+        return plan
+
+    # le solve monolithique garde les landmarks, atteints au plus tard à leur échéance
+    data = dict(infos, landmarks=deadlines(infos, stats["landmarks"]))
+    if engine == "asp":
+        from plan_asp import plan_asp
+
+        return plan_asp(data)
+
+    from utils_bounds import is_trivially_infeasible
+    from utils_sat import convert_model, exec_pysat_clauses, level_data_to_clauses
+
+    if is_trivially_infeasible(data):
+        return None
+    # clauses données directement au solveur, sans fichier cnf
+    v2n, clauses = level_data_to_clauses(data)
+    n2v = {i: v for v, i in v2n.items()}
+    sat, model = exec_pysat_clauses(clauses.unique())
+    if not sat:
+        return None
+    return convert_model([n2v[i] for i in model if i > 0 and n2v[i][0] == "do"])
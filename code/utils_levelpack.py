@@ -0,0 +1,110 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module reads level packs: many Helltaker levels stored in a single file, separated by a
+delimiter line. Each level keeps the format of `grid_from_file` (title, max number of moves,
+description of the level).
+
+The pack is memory-mapped and the levels are parsed lazily, one at a time. The grid of a level is
+kept as a single `bytes` object (row-major, rows padded with spaces to the width of the level).
+"""
+
+import mmap
+from typing import Iterator, List, NamedTuple
+from utils_helltaker import convert
+
+DELIMITER = "---"
+
+
+class LevelRecord(NamedTuple):
+    title: str
+    max_steps: int
+    m: int  # nombre de lignes
+    n: int  # nombre de colonnes
+    grid: bytes  # m * n caractères, ligne par ligne
+
+    def cell(self, i: int, j: int) -> str:
+        """
+        :param i: line
+        :param j: column
+        :return: character of the cell (i, j)
+        """
+        return chr(self.grid[i * self.n + j])
+
+
+def record_from_lines(lines: List[bytes]) -> LevelRecord:
+    """
+    :param lines: lines of one level (title, max number of moves, description)
+    :return: the level record
+    """
+    title = lines[0].rstrip().decode("utf-8")
+    max_steps = int(lines[1])
+    rows = [l.rstrip() for l in lines[2:]]
+    rows = [r for r in rows if r != b""]
+    n = max((len(r) for r in rows), default=0)
+
+    return LevelRecord(
+        title, max_steps, len(rows), n, b"".join(r.ljust(n) for r in rows)
+    )
+
+
+def records_from_pack(
+    filename: str, delimiter: str = DELIMITER
+) -> Iterator[LevelRecord]:
+    """
+    :param filename: file containing the levels
+    :param delimiter: line separating two levels
+    :return: iterator over the levels of the file, parsed on demand
+    """
+    delim = delimiter.encode("utf-8")
+
+    with open(filename, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # fichier vide
+            return
+
+    with mm:
+        lines = []
+        for line in iter(mm.readline, b""):
+            if line.rstrip() == delim:
+                if lines:
+                    yield record_from_lines(lines)
+                lines = []
+            elif lines or line.strip() != b"":
+                lines.append(line)
+        if lines:
+            yield record_from_lines(lines)
+
+
+def record_to_infos(record: LevelRecord, voc: dict = {}) -> dict:
+    """
+    :param record: a level record
+    :param voc: argument facultatif permettant de convertir chaque case de la grille
+    :return: the same dict as `grid_from_file`
+    """
+    text = record.grid.decode("utf-8")
+    grid = [list(text[i * record.n : (i + 1) * record.n]) for i in range(record.m)]
+    if voc:
+        grid = convert(grid, voc)
+
+    return {
+        "grid": grid,
+        "title": record.title,
+        "m": record.m,
+        "n": record.n,
+        "max_steps": record.max_steps,
+    }
+
+
+def infos_from_pack(
+    filename: str, delimiter: str = DELIMITER, voc: dict = {}
+) -> Iterator[dict]:
+    """
+    :param filename: file containing the levels
+    :param delimiter: line separating two levels
+    :param voc: argument facultatif permettant de convertir chaque case de la grille
+    :return: iterator over the levels of the file, in the format of `grid_from_file`
+    """
+    for record in records_from_pack(filename, delimiter):
+        yield record_to_infos(record, voc)
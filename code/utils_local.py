@@ -0,0 +1,223 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module searches a plan by stochastic local search over the simulator (`utils_simulation`),
+for the levels with many solutions where a complete search is not needed.
+
+A candidate is a udlr plan, scored by simulating it: the score is the smallest distance to the
+demoness reached along the plan (distance of the hero on the walls only, through the key when
+the lock is still closed), 0 once the demoness is reached within max_steps. The search alternates
+random walks (restarts) and hill climbing on mutations of the current plan (one direction
+changed, inserted or removed, or the end of the plan replaced by a random walk). The states along
+a plan are kept, so a mutation is only simulated from the position where it changes the plan.
+The search is incomplete: it gives up after its budget without proving anything.
+"""
+
+import random
+from collections import deque
+from time import perf_counter
+from typing import Callable, List, Optional, Tuple
+from utils_simulation import DIRECTIONS, State, initial_state, level_from_infos, step
+
+OPPOSITE = {"u": "d", "d": "u", "l": "r", "r": "l"}
+UNREACHABLE = 10**6
+
+# (plan, états après chaque direction du plan, score)
+Candidate = Tuple[str, List[State], Tuple[int, int]]
+
+
+def distances(level: dict, sources, with_lock: bool) -> dict:
+    """
+    :param level: static description of the level
+    :param sources: cells at distance 0
+    :param with_lock: the lock can not be crossed
+    :return: distance of each cell to the sources (walls only, the objects are ignored)
+    """
+    dist = {c: 0 for c in sources}
+    queue = deque(dist)
+    while queue:
+        i, j = queue.popleft()
+        for di, dj in DIRECTIONS.values():
+            q = (i + di, j + dj)
+            if q in level["cells"] and q not in dist:
+                if with_lock and q == level["lock"]:
+                    continue
+                dist[q] = dist[(i, j)] + 1
+                queue.append(q)
+    return dist
+
+
+def heuristic(level: dict) -> Callable[[State], int]:
+    """
+    :param level: static description of the level
+    :return: function giving the distance of a state to the demoness
+    """
+    open_lock = distances(level, level["goal"], with_lock=False)
+    if level["lock"] is None or level["key"] is None:
+        return lambda state: open_lock.get(state.hero, UNREACHABLE)
+
+    closed_lock = distances(level, level["goal"], with_lock=True)
+    to_key = distances(level, [level["key"]], with_lock=True)
+    key_to_goal = open_lock.get(level["key"], UNREACHABLE)
+
+    def h(state: State) -> int:
+        if state.have_key:
+            return open_lock.get(state.hero, UNREACHABLE)
+        # sans la clé : directement, ou en passant par la clé
+        return min(
+            closed_lock.get(state.hero, UNREACHABLE),
+            to_key.get(state.hero, UNREACHABLE) + key_to_goal,
+        )
+
+    return h
+
+
+def evaluate(
+    level: dict,
+    h: Callable[[State], int],
+    max_steps: int,
+    states: List[State],
+    plan: str,
+    start: int,
+) -> Candidate:
+    """
+    :param level: static description of the level
+    :param h: distance of a state to the demoness
+    :param max_steps: max number of actions
+    :param states: states after each direction of a plan sharing plan[:start]
+    :param plan: plan to evaluate
+    :param start: number of directions of the plan already simulated in states
+    :return: the plan without its impossible directions, its states and its score
+    """
+    states = states[: start + 1]
+    kept = list(plan[:start])
+    for direction in plan[start:]:
+        state = states[-1]
+        if state.hero in level["goal"]:
+            break
+        following = step(level, state, direction)
+        if following is None:
+            continue  # direction impossible (mur, lock fermé) : ignorée
+        if following.steps > max_steps:
+            break
+        states.append(following)
+        kept.append(direction)
+
+    # meilleure distance atteinte le long du plan, au plus tôt
+    score = min((h(s), k) for k, s in enumerate(states))
+    return "".join(kept), states, score
+
+
+def random_walk(
+    level: dict, max_steps: int, state: State, rng: random.Random, last: str = None
+) -> str:
+    """
+    :param level: static description of the level
+    :param max_steps: max number of actions
+    :param state: state to start from
+    :param rng: random generator
+    :param last: previous direction (the walk avoids going straight back)
+    :return: random directions until the demoness or max_steps
+    """
+    walk = []
+    while state.hero not in level["goal"]:
+        moves = []
+        for direction in DIRECTIONS:
+            following = step(level, state, direction)
+            if following is not None and following.steps <= max_steps:
+                moves.append((direction, following))
+        if not moves:
+            break
+        forward = [m for m in moves if last is None or m[0] != OPPOSITE[last]]
+        last, state = rng.choice(forward if forward and rng.random() < 0.9 else moves)
+        walk.append(last)
+    return "".join(walk)
+
+
+def mutate(
+    level: dict,
+    h: Callable[[State], int],
+    max_steps: int,
+    candidate: Candidate,
+    rng: random.Random,
+) -> Candidate:
+    """
+    :param level: static description of the level
+    :param h: distance of a state to the demoness
+    :param max_steps: max number of actions
+    :param candidate: current plan, its states and its score
+    :param rng: random generator
+    :return: a mutated candidate
+    """
+    plan, states, _ = candidate
+    i = rng.randrange(len(plan) + 1)
+    kind = rng.random()
+
+    if kind < 0.3 or i == len(plan):
+        # la fin du plan est remplacée par une marche aléatoire
+        last = plan[i - 1] if i > 0 else None
+        new = plan[:i] + random_walk(level, max_steps, states[i], rng, last)
+    elif kind < 0.6:
+        new = plan[:i] + rng.choice("udlr") + plan[i + 1 :]
+    elif kind < 0.8:
+        new = plan[:i] + rng.choice("udlr") + plan[i:]
+    else:
+        new = plan[:i] + plan[i + 1 :]
+
+    return evaluate(level, h, max_steps, states, new, i)
+
+
+def local_search(
+    infos: dict,
+    time_budget: float = 1.0,
+    max_candidates: int = None,
+    restart_after: int = 300,
+    seed: int = None,
+    stats: dict = None,
+) -> Optional[str]:
+    """
+    :param infos: dict containing all map data
+    :param time_budget: time limit of the search (s)
+    :param max_candidates: limit on the number of simulated candidates (None: no limit)
+    :param restart_after: number of candidates without improvement before a restart
+    :param seed: seed of the random generator
+    :param stats: dict completed with the number of candidates, restarts and the time
+    :return: a plan (udlr) reaching the demoness within max_steps, None if none was found
+    """
+    level = level_from_infos(infos)
+    h = heuristic(level)
+    max_steps = infos["max_steps"]
+    rng = random.Random(seed)
+    start = initial_state(infos)
+
+    begin = perf_counter()
+    candidates, restarts, stall = 0, 0, 0
+    current = None
+    plan = None
+
+    while perf_counter() - begin < time_budget and (
+        max_candidates is None or candidates < max_candidates
+    ):
+        if current is None or stall >= restart_after:
+            walk = random_walk(level, max_steps, start, rng)
+            current = evaluate(level, h, max_steps, [start], walk, 0)
+            restarts += 1
+            stall = 0
+        else:
+            candidate = mutate(level, h, max_steps, current, rng)
+            # les mouvements de même score sont acceptés pour traverser les plateaux
+            stall = 0 if candidate[2] < current[2] else stall + 1
+            if candidate[2] <= current[2]:
+                current = candidate
+        candidates += 1
+
+        if current[2][0] == 0:
+            k = current[2][1]  # premier état à côté d'une demoness
+            plan = current[0][:k]
+            break
+
+    if stats is not None:
+        stats.update(
+            candidates=candidates, restarts=restarts, time_s=perf_counter() - begin
+        )
+    return plan
@@ -0,0 +1,119 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module computes optimal plans with the MaxSAT solver RC2 of pysat.
+
+The hard clauses are the encoding where a plan may end before the horizon (stop_at_goal): once
+the demoness is reached, the hero is in a terminal "done" state where the only action is nop.
+The soft clauses prefer nop at each step (weight W), then no hurt at each step (weight 1), with
+W = max_steps + 1 so that the number of steps before the demoness is minimised first and the
+number of hurts second (lexicographic order, solved level by level by the stratified RC2). The
+steps under the lower bound of `utils_bounds` are forced to be actual actions (hard clauses).
+
+The bounds found on the way are reported: a lower bound after each core, an upper bound after
+each optimisation level, given by the model found.
+"""
+
+from math import copysign
+from typing import Callable, List, Optional, Tuple
+from utils_sat import NOP, level_data_to_clauses
+
+# (type de borne "lower" ou "upper", nombre de pas, nombre de hurts)
+Bound = Tuple[str, int, int]
+
+
+def plan_cost(model: List) -> Tuple[int, int]:
+    """
+    :param model: true variables "do" of a model
+    :return: number of steps before the demoness (hurts included), number of hurts
+    """
+    steps = sum(1 for _, _, a in model if a != NOP)
+    hurts = sum(1 for _, _, a in model if a == "hurt")
+    return steps, hurts
+
+
+def sat_optimal(
+    data: dict,
+    on_bound: Callable[[Bound], None] = None,
+    invariants: bool = False,
+    trap_phase: bool = False,
+    solver: str = "g3",
+) -> Optional[Tuple[List, int, int]]:
+    """
+    :param data: dict containing all level data
+    :param on_bound: function called with each bound found during the search
+    :param invariants: strengthen the encoding with the inferred invariants
+    :param trap_phase: encode the traps with one global phase per step
+    :param solver: SAT oracle of RC2 (pysat name)
+    :return: the true variables "do" of an optimal plan, its number of steps and of hurts,
+        None if there is no plan within max_steps
+    """
+    from pysat.examples.rc2 import RC2Stratified
+    from pysat.formula import WCNF
+    from utils_bounds import plan_length_lower_bound
+
+    t_max = data["max_steps"]
+    lower = plan_length_lower_bound(data)
+    if lower is None or lower > t_max:
+        return None
+
+    v2n, clauses = level_data_to_clauses(
+        data, invariants, trap_phase, stop_at_goal=True
+    )
+    n2v = {i: v for v, i in v2n.items()}
+    weight = t_max + 1
+
+    wcnf = WCNF()
+    wcnf.extend(clauses.unique().to_lists())
+    # au moins `lower` actions avant d'atteindre la demoness
+    for t in range(min(lower, t_max)):
+        wcnf.append([-v2n[("do", t, NOP)]])
+    for t in range(t_max):
+        wcnf.append([v2n[("do", t, NOP)]], weight=weight)
+        wcnf.append([-v2n[("do", t, "hurt")]], weight=1)
+
+    def decode(model: List[int]) -> List:
+        return [n2v[i] for i in model if i > 0 and i in n2v and n2v[i][0] == "do"]
+
+    # seules les bornes qui s'améliorent sont signalées
+    best = {"lower": (lower, 0), "upper": None}
+
+    def report(kind: str, steps: int, hurts: int):
+        old = best[kind]
+        if old is None or (
+            (steps, hurts) > old if kind == "lower" else (steps, hurts) < old
+        ):
+            best[kind] = (steps, hurts)
+            if on_bound is not None:
+                on_bound((kind, steps, hurts))
+
+    class BoundedRC2(RC2Stratified):
+        def process_core(self):
+            super().process_core()
+            # le coût courant minore le coût optimal W * pas + hurts, avec hurts < W
+            report("lower", self.cost // weight, 0)
+
+        def compute_(self):
+            res = super().compute_()
+            if res:
+                i2e = self.vmap.i2e
+                model = [
+                    int(copysign(i2e[abs(x)], x))
+                    for x in self.oracle.get_model()
+                    if abs(x) in i2e
+                ]
+                report("upper", *plan_cost(decode(model)))
+            return res
+
+    if on_bound is not None:
+        on_bound(("lower", lower, 0))
+
+    with BoundedRC2(wcnf, solver=solver) as rc2:
+        model = rc2.compute()
+
+    if model is None:
+        return None
+
+    plan = decode(model)
+    steps, hurts = plan_cost(plan)
+    return plan, steps, hurts
@@ -0,0 +1,167 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module exports the statistics of the solvers (`call_solver(..., return_stats=True)` and
+`sat_solving(..., return_stats=True)`) as metrics in the Prometheus text format.
+
+Each solving gives one sample: its labels (level, engine, solver...) and its statistics. The
+samples are written in a file (for the textfile collector of node_exporter) or served on a local
+HTTP endpoint, read at each scrape.
+
+Run: python3 utils_metrics.py [--engine sat|asp] [--output FILE | --port PORT] ../levels/level*.txt
+"""
+
+import os
+import sys
+import threading
+from typing import List, Tuple
+
+PREFIX = "helltaker_"
+
+# statistique -> description de la métrique (toutes des gauges : valeurs du dernier solving)
+METRICS = {
+    "atoms": "Ground atoms of the ASP program",
+    "rules": "Ground rules of the ASP program",
+    "vars": "Variables of the SAT problem",
+    "clauses": "Clauses of the SAT problem",
+    "choices": "Choices of the ASP solver",
+    "decisions": "Decisions of the SAT solver",
+    "conflicts": "Conflicts of the solver",
+    "propagations": "Propagations of the SAT solver",
+    "restarts": "Restarts of the SAT solver",
+    "models": "Models enumerated by the ASP solver",
+    "solve_s": "Solving time in seconds",
+    "satisfiable": "1 if a plan was found, 0 otherwise",
+}
+
+Sample = Tuple[dict, dict]  # (labels, statistiques)
+
+
+def escape_label(value) -> str:
+    """
+    :param value: value of a label
+    :return: the value escaped for the text format
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_metrics(samples: List[Sample]) -> str:
+    """
+    :param samples: labels and statistics of each solving
+    :return: the metrics in the Prometheus text format
+    """
+    lines = []
+    for stat, description in METRICS.items():
+        values = [(labels, stats[stat]) for labels, stats in samples if stat in stats]
+        if not values:
+            continue
+        name = PREFIX + stat
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in values:
+            text = ",".join(f'{k}="{escape_label(v)}"' for k, v in labels.items())
+            lines.append(f"{name}{{{text}}} {float(value):g}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(filename: str, samples: List[Sample]):
+    """
+    :param filename: output file (replaced at once, never read half written)
+    :param samples: labels and statistics of each solving
+    """
+    tmp = filename + ".tmp"
+    with open(tmp, "w", encoding="utf8") as f:
+        f.write(format_metrics(samples))
+    os.replace(tmp, filename)
+
+
+def serve_metrics(samples: List[Sample], port: int = 9100, host: str = "127.0.0.1"):
+    """
+    :param samples: labels and statistics of each solving, may be extended while served
+    :param port: port of the HTTP endpoint
+    :param host: address of the HTTP endpoint (local only by default)
+    :return: the server, running in a background thread (stopped by its shutdown method)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = format_metrics(list(samples)).encode("utf8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # pas de ligne sur stderr à chaque scrape
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def level_sample(filename: str, engine: str = "sat") -> Sample:
+    """
+    :param filename: level file
+    :param engine: "sat" or "asp"
+    :return: labels and statistics of the solving of the level
+    """
+    from utils_helltaker import grid_from_file
+
+    infos = grid_from_file(filename)
+    level = os.path.splitext(os.path.basename(filename))[0]
+
+    if engine == "sat":
+        from utils_sat import sat_solving
+
+        _, stats = sat_solving(infos, solver="pysat", return_stats=True)
+    else:
+        from utils_asp import grid_to_model, call_solver
+
+        _, stats = call_solver(grid_to_model(infos), 1, return_stats=True)
+
+    labels = {"level": level, "engine": engine}
+    if "solver" in stats:
+        labels["solver"] = stats["solver"]
+    return labels, stats
+
+
+def main():
+    """
+    Solve the given levels and export the statistics of each solving
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("levels", nargs="+", help="level files")
+    parser.add_argument("--engine", choices=("sat", "asp"), default="sat")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--output", metavar="FILE", help="write the metrics in FILE")
+    output.add_argument("--port", type=int, help="serve the metrics on this port")
+    args = parser.parse_args()
+
+    samples = []
+    server = serve_metrics(samples, args.port) if args.port else None
+
+    for filename in args.levels:
+        samples.append(level_sample(filename, args.engine))
+        if args.output:
+            write_metrics(args.output, samples)
+
+    if server is not None:
+        print("metrics served on port", args.port, file=sys.stderr)
+        try:
+            threading.Event().wait()  # jusqu'à Ctrl-C
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif not args.output:
+        sys.stdout.write(format_metrics(samples))
+
+
+if __name__ == "__main__":
+    main()
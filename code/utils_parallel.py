@@ -0,0 +1,214 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module solves the SAT encoding of a level in parallel (cube and conquer).
+
+The search space is split into cubes: either every combination of the actions of the first k
+steps, or every sign combination of k variables selected by lookahead (the variables whose
+two polarities propagate the most literals). The cubes refuted by unit propagation are dropped,
+the other ones are solved as assumptions by a pool of pysat solvers, one process per core.
+Everything is stopped as soon as a cube is satisfiable.
+
+Run: python3 utils_parallel.py level.txt [k] [processes]
+"""
+
+import sys
+import time
+from itertools import product
+from typing import Iterable, List, Optional, Tuple
+from utils_helltaker import grid_from_file, check_plan
+from utils_sat import ACTIONS, Clause, level_data_to_clauses, convert_model
+
+Cube = Tuple[int, ...]
+
+# solveur de chaque processus du pool, construit une seule fois par `init_worker`
+_SOLVER = None
+
+
+def action_cubes(var2n: dict, k: int) -> List[Cube]:
+    """
+    :param var2n: dict giving the corresponding number for each variable
+    :param k: number of steps fixed by the cubes
+    :return: one cube per sequence of k first actions
+    """
+    steps = [[var2n[("do", t, a)] for a in ACTIONS] for t in range(k)]
+
+    return list(product(*steps))
+
+
+def lookahead_variables(solver, candidates: List[int], k: int) -> List[int]:
+    """
+    :param solver: pysat solver containing the formula
+    :param candidates: variables which may be selected
+    :param k: number of variables to select
+    :return: the k variables maximizing the product of the propagations of both polarities
+    """
+    scores = []
+    for x in candidates:
+        ok_pos, lits_pos = solver.propagate(assumptions=[x])
+        ok_neg, lits_neg = solver.propagate(assumptions=[-x])
+        if not ok_pos or not ok_neg:
+            continue  # variable déjà décidée par propagation
+        scores.append(((len(lits_pos) + 1) * (len(lits_neg) + 1), x))
+
+    scores.sort(reverse=True)
+
+    return [x for _, x in scores[:k]]
+
+
+def lookahead_cubes(solver, candidates: List[int], k: int) -> List[Cube]:
+    """
+    :param solver: pysat solver containing the formula
+    :param candidates: variables which may be selected
+    :param k: number of variables to split on
+    :return: the 2^k sign combinations of the selected variables
+    """
+    variables = lookahead_variables(solver, candidates, k)
+
+    return [
+        tuple(x if s else -x for x, s in zip(variables, signs))
+        for signs in product((True, False), repeat=len(variables))
+    ]
+
+
+def filter_cubes(solver, cubes: List[Cube]) -> List[Cube]:
+    """
+    :param solver: pysat solver containing the formula
+    :param cubes: candidate cubes
+    :return: the cubes which are not refuted by unit propagation
+    """
+    return [cube for cube in cubes if solver.propagate(assumptions=list(cube))[0]]
+
+
+def init_worker(clauses: Iterable[Clause]):
+    """
+    :param clauses: clauses of the level, loaded once in the solver of the process
+    """
+    from pysat.solvers import Glucose4
+
+    global _SOLVER
+    _SOLVER = Glucose4(bootstrap_with=clauses)
+
+
+def solve_cube(cube: Cube) -> Tuple[Cube, bool, Optional[List[int]], float]:
+    """
+    :param cube: assumptions to solve
+    :return: the cube, sat (bool), the model if sat and the solving time (s)
+    """
+    start = time.perf_counter()
+    sat = _SOLVER.solve(assumptions=list(cube))
+    elapsed = time.perf_counter() - start
+
+    return cube, sat, _SOLVER.get_model() if sat else None, elapsed
+
+
+def solve_cubes(
+    clauses: Iterable[Clause], cubes: List[Cube], processes: int = None
+) -> Tuple[Optional[List[int]], List[Tuple[Cube, bool, float]]]:
+    """
+    :param clauses: clauses of the level
+    :param cubes: cubes splitting the search space
+    :param processes: size of the pool (number of cores by default)
+    :return: a model (None if every cube is unsat) and the (cube, sat, time) of the solved cubes
+    """
+    from multiprocessing import Pool
+
+    timings = []
+    model = None
+
+    pool = Pool(processes, initializer=init_worker, initargs=(clauses,))
+    try:
+        for cube, sat, cube_model, elapsed in pool.imap_unordered(solve_cube, cubes):
+            timings.append((cube, sat, elapsed))
+            if sat:
+                model = cube_model
+                break
+    finally:
+        # les cubes encore en cours sont abandonnés dès qu'un modèle est trouvé
+        pool.terminate()
+        pool.join()
+
+    return model, timings
+
+
+def sat_solving_parallel(
+    data: dict,
+    k: int = 2,
+    processes: int = None,
+    lookahead: bool = False,
+    invariants: bool = False,
+    trap_phase: bool = False,
+):
+    """
+    :param data: dict containing all level data
+    :param k: number of steps (or of lookahead variables) the cubes are split on
+    :param processes: size of the pool (number of cores by default)
+    :param lookahead: split on variables selected by lookahead instead of the first actions
+    :param invariants: strengthen the encoding with the inferred invariants
+    :param trap_phase: encode the traps with one global phase per step
+    :return: a model if sat (true variables "do"), None otherwise
+    """
+    from pysat.solvers import Glucose4
+    from utils_bounds import is_trivially_infeasible
+
+    if is_trivially_infeasible(data):
+        print("pas de plan de taille", data["max_steps"])
+        return None
+
+    v2n, clauses = level_data_to_clauses(data, invariants, trap_phase)
+    n2v = {i: v for v, i in v2n.items()}
+    clauses = clauses.unique()  # avoid equal clauses
+    k = min(k, data["max_steps"])
+
+    with Glucose4(bootstrap_with=clauses) as solver:
+        if lookahead:
+            candidates = [i for v, i in v2n.items() if v[0] == "do"]
+            cubes = lookahead_cubes(solver, candidates, k)
+        else:
+            cubes = action_cubes(v2n, k)
+        n_cubes = len(cubes)
+        cubes = filter_cubes(solver, cubes)
+
+    print(f"{len(cubes)} cubes ({n_cubes - len(cubes)} refuted)", file=sys.stderr)
+
+    start = time.perf_counter()
+    model, timings = solve_cubes(clauses, cubes, processes)
+    for cube, sat, elapsed in timings:
+        actions = " ".join(
+            ("" if x > 0 else "-") + "{1}:{2}".format(*n2v[abs(x)]) for x in cube
+        )
+        print(
+            f"  {'SAT  ' if sat else 'UNSAT'} {elapsed:8.3f}s  {actions}",
+            file=sys.stderr,
+        )
+    print(f"wall time {time.perf_counter() - start:.3f}s", file=sys.stderr)
+
+    if model is None:
+        print("pas de plan de taille", data["max_steps"])
+        return None
+
+    return [n2v[i] for i in model if i > 0 and n2v[i][0] == "do"]
+
+
+def main():
+    filename = sys.argv[1]
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    infos = grid_from_file(filename)
+    sat_model = sat_solving_parallel(infos, k, processes)
+
+    if sat_model is None:
+        print("[Err] no plan in", infos["max_steps"], "moves", file=sys.stderr)
+        sys.exit(1)
+
+    plan = convert_model(sat_model)
+    if check_plan(plan):
+        print("[OK]", plan)
+    else:
+        print("[Err]", plan, file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
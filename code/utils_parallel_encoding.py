@@ -0,0 +1,103 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module generates the clauses of the cells (`clauses_cells`) with several processes, for
+large maps where the encoding and not the solving is the bottleneck.
+
+The cells are split into contiguous slices, a few per process for the balance of the load. Each
+worker writes the clauses of its slice into a shared memory block (flat array of literals then
+offsets, as in `ClauseBuffer`) and only sends back its name and sizes: the clauses are never
+pickled. The blocks are concatenated in the order of the cells, which gives exactly the clauses
+of the sequential encoding. The variables and the index of the level are inherited by the
+workers when the processes are forked (given once to each worker otherwise).
+"""
+
+import os
+from typing import List, Tuple
+from utils_clauses import ClauseBuffer
+from utils_index import LevelIndex
+from utils_sat import ACTIONS, clauses_cells
+
+SLICES_PER_PROCESS = 4  # plusieurs tranches par processus pour équilibrer la charge
+
+_JOB = None  # (var2n, index, t_max, actions, binary_position) du processus
+
+
+def init_worker(job: tuple):
+    """
+    :param job: var2n, index, t_max, actions and binary_position of the encoding
+    """
+    global _JOB
+    _JOB = job
+
+
+def encode_slice(bounds: Tuple[int, int]) -> Tuple[str, int, int]:
+    """
+    :param bounds: first and last (excluded) ids of the cells of the slice
+    :return: shared memory block of the clauses of the slice (`ClauseBuffer.to_shared_memory`)
+    """
+    var2n, index, t_max, actions, binary_position = _JOB
+    start, stop = bounds
+    clauses = clauses_cells(
+        var2n, index, t_max, index.cells[start:stop], actions, binary_position
+    )
+    return clauses.to_shared_memory()
+
+
+def cell_slices(n_cells: int, n_slices: int) -> List[Tuple[int, int]]:
+    """
+    :param n_cells: number of cells
+    :param n_slices: number of slices wanted
+    :return: bounds of contiguous slices of (almost) the same size covering all the cells
+    """
+    n_slices = max(1, min(n_slices, n_cells))
+    bounds = [n_cells * k // n_slices for k in range(n_slices + 1)]
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+
+def clauses_cells_parallel(
+    var2n: dict,
+    index: LevelIndex,
+    t_max: int,
+    actions: Tuple[str] = ACTIONS,
+    binary_position: bool = False,
+    processes: int = None,
+) -> ClauseBuffer:
+    """
+    :param var2n: dict giving the corresponding number for each variable
+    :param index: index of the level
+    :param t_max: horizon
+    :param actions: possible actions
+    :param binary_position: the moves of the hero are given by `utils_binary`
+    :param processes: number of worker processes (number of cores by default)
+    :return: the clauses of all the cells, in the order of `clauses_cells`
+    """
+    import multiprocessing
+    from multiprocessing import resource_tracker
+
+    processes = processes or os.cpu_count() or 1
+    slices = cell_slices(len(index.cells), processes * SLICES_PER_PROCESS)
+
+    # le suivi des blocs partagés doit être commun aux workers et au processus principal
+    resource_tracker.ensure_running()
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+
+    clauses = ClauseBuffer()
+    job = (var2n, index, t_max, actions, binary_position)
+    with context.Pool(processes, initializer=init_worker, initargs=(job,)) as pool:
+        blocks = pool.map(encode_slice, slices)
+
+    # tous les blocs sont relus (et libérés) même si l'un d'eux échoue
+    error = None
+    for block in blocks:
+        try:
+            clauses.extend_from_shared_memory(*block)
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+
+    return clauses
@@ -5,20 +5,26 @@ This module contains the necessary functions to solve the problem in SAT
 """
 
 import sys
-from time import time
-from typing import List, Tuple, Set
-from itertools import combinations
-import subprocess
-from utils_helltaker import grid_from_file, convert_action
+from typing import Iterable, Iterator, List, Tuple
+from utils_clauses import ClauseBuffer
+from utils_helltaker import (
+    Coord,
+    adjacent,
+    convert_action,
+    goal_cells,
+    grid_from_file,
+    grid_to_coords_dict,
+    level_coords,
+)
+from utils_index import DELTAS, PUSHES, LevelIndex
+from utils_trace import phase
 
 
 # alias de type
-Grid = List[List[str]]
 Variable = int
 Literal = int
 Clause = List[Literal]
 Map = List[List[Literal]]
-Coord = Tuple[int, int]
 
 
 ACTIONS = (
@@ -37,146 +43,118 @@ ACTIONS = (
     "push_mob_down",
 )
 
+# action ajoutée une fois la demoness atteinte, pour finir le plan avant l'horizon
+NOP = "nop"
 
-def grid_to_coords_dict(grid: Grid) -> dict:
-    """
-    :param grid: grid of the level
-    :return: dict containing position of each element
-    """
-    coords = {
-        "cells": [],
-        "empty": [],
-        "hero": [],
-        "demonesses": [],
-        "key": [],
-        "lock": [],
-        "spikes": [],
-        "traps_safe": [],
-        "traps_unsafe": [],
-        "blocks": [],
-        "mobs": [],
-    }
 
-    for i, line in enumerate(grid):
-        for j, cell in enumerate(line):
-            if cell != "#":
-                coords["cells"].append((i, j))
-            if cell in ["S", " ", "T", "U", "K"]:
-                coords["empty"].append((i, j))
-            if cell == "H":
-                coords["hero"].append((i, j))
-            elif cell == "D":
-                coords["demonesses"].append((i, j))
-            elif cell == "K":
-                coords["key"].append((i, j))
-            elif cell == "L":
-                coords["lock"].append((i, j))
-            elif cell == "S":
-                coords["spikes"].append((i, j))
-            elif cell == "T":
-                coords["traps_safe"].append((i, j))
-            elif cell == "U":
-                coords["traps_unsafe"].append((i, j))
-            elif cell == "B":
-                coords["blocks"].append((i, j))
-            elif cell == "M":
-                coords["mobs"].append((i, j))
-            elif cell == "O":
-                coords["blocks"].append((i, j))
-                coords["spikes"].append((i, j))
-            elif cell == "P":
-                coords["blocks"].append((i, j))
-                coords["traps_safe"].append((i, j))
-            elif cell == "Q":
-                coords["blocks"].append((i, j))
-                coords["traps_unsafe"].append((i, j))
-
-    return coords
-
-
-def vocabulary(coords: dict, t_max: int) -> dict:
+def vocabulary(
+    coords: dict, t_max: int, trap_phase: bool = False, actions: Tuple[str] = ACTIONS
+) -> dict:
     """
     :param coords: dict containing coord of each element of the map
     :param t_max: horizon
+    :param trap_phase: one global phase variable per step instead of one variable per trap
+    :param actions: possible actions (ACTIONS, with NOP to stop once the goal is reached)
     :return: dict containing all the vocabulary
     """
     cells = coords["cells"]
     traps = coords["traps_unsafe"] + coords["traps_safe"]
 
-    act_vars = [("do", t, a) for t in range(t_max) for a in ACTIONS]
+    act_vars = [("do", t, a) for t in range(t_max) for a in actions]
     at_vars = [("at", t, c) for t in range(t_max + 1) for c in cells]
     spike_vars = [("spike", t, c) for t in range(t_max + 1) for c in cells]
-    traps_vars = [("trap", t, c) for t in range(t_max + 1) for c in traps]
+    if trap_phase:
+        traps_vars = [("phase", t) for t in range(t_max + 1)]
+    else:
+        traps_vars = [("trap", t, c) for t in range(t_max + 1) for c in traps]
     have_key_vars = [("have_key", t) for t in range(t_max + 1)]
     empty_cell_vars = [("empty", t, c) for t in range(t_max + 1) for c in cells]
     block_vars = [("block", t, c) for t in range(t_max + 1) for c in cells]
     mob_vars = [("mob", t, c) for t in range(t_max + 1) for c in cells]
 
+    # the variables depending only on the layout (cells) and the horizon come first,
+    # so that their numbering does not change when objects are moved on the map
     return {
         v: i + 1
         for i, v in enumerate(
             act_vars
             + at_vars
             + spike_vars
-            + traps_vars
-            + have_key_vars
             + block_vars
             + empty_cell_vars
             + mob_vars
+            + have_key_vars
+            + traps_vars
         )
     }
 
 
-def clauses_exactly_one_action(var2n: dict, t_max: int) -> List[Clause]:
+def clauses_exactly_one_action(
+    var2n: dict, t_max: int, actions: Tuple[str] = ACTIONS
+) -> List[Clause]:
     """
     :param var2n: dict giving the corresponding number for each variable
     :param t_max: horizon
+    :param actions: possible actions
     :return: clauses to have exactly one action each turn
     """
-    at_least_one_act = [[var2n[("do", t, a)] for a in ACTIONS] for t in range(t_max)]
+    from itertools import combinations
+
+    at_least_one_act = [[var2n[("do", t, a)] for a in actions] for t in range(t_max)]
     at_most_one_act = [
         [-var2n[("do", t, a1)], -var2n[("do", t, a2)]]
         for t in range(t_max)
-        for a1, a2 in combinations(ACTIONS, 2)
+        for a1, a2 in combinations(actions, 2)
     ]
     return at_least_one_act + at_most_one_act
 
 
-def clauses_initial_state(var2n: dict, coords: dict, t_max: int) -> List[Clause]:
+def clauses_initial_state(
+    var2n: dict,
+    coords: dict,
+    t_max: int,
+    trap_phase: bool = False,
+    index: LevelIndex = None,
+) -> List[Clause]:
     """
     :param var2n: dict giving the corresponding number for each variable
     :param coords: dict containing coord of each element of the map
     :param t_max: horizon
+    :param trap_phase: the traps are described by a global phase
+    :param index: index of the level (built from coords if not given)
     :return: clauses corresponding to the initial state
     """
+    index = index or LevelIndex(coords)
     clauses = []
     # HERO
     for coord in coords["hero"]:
         clauses.append([var2n[("at", 0, coord)]])
-    for coord in [cell for cell in coords["cells"] if cell not in coords["hero"]]:
+    for coord in index.select(index.masks["hero"], inside=False):
         clauses.append([-var2n[("at", 0, coord)]])
 
     # SPIKES AND TRAPS
     # les spikes sont toujours là, et une case qui n'est pas un spike ou un trap
     # ne sera jamais un spike
+    never_spikes = index.select(
+        index.union("spikes", "traps_safe", "traps_unsafe"), inside=False
+    )
     for t in range(t_max + 1):
         for coord in coords["spikes"]:
             clauses.append([var2n[("spike", t, coord)]])
-        for coord in [
-            cell
-            for cell in coords["cells"]
-            if cell
-            not in coords["spikes"] + coords["traps_safe"] + coords["traps_unsafe"]
-        ]:
+        for coord in never_spikes:
             clauses.append([-var2n[("spike", t, coord)]])
 
-    # traps safe
-    for coord in coords["traps_safe"]:
-        clauses.append([var2n[("trap", 0, coord)]])
+    if trap_phase:
+        # phase vraie : les traps sont dans leur état initial
+        clauses.append([var2n[("phase", 0)]])
+    else:
+        # traps safe
+        for coord in coords["traps_safe"]:
+            clauses.append([var2n[("trap", 0, coord)]])
 
-    # traps unsafe
-    for coord in coords["traps_unsafe"]:
-        clauses.append([-var2n[("trap", 0, coord)]])
+        # traps unsafe
+        for coord in coords["traps_unsafe"]:
+            clauses.append([-var2n[("trap", 0, coord)]])
 
     # LOCK AND KEY
     # on ne commence pas avec la clé
@@ -185,13 +163,13 @@ def clauses_initial_state(var2n: dict, coords: dict, t_max: int) -> List[Clause]
     # BLOCKS
     for coord in coords["blocks"]:
         clauses.append([var2n[("block", 0, coord)]])
-    for coord in [cell for cell in coords["cells"] if cell not in coords["blocks"]]:
+    for coord in index.select(index.masks["blocks"], inside=False):
         clauses.append([-var2n[("block", 0, coord)]])
 
     # EMPTY CELLS (without block, lock, mob or demoness)
     for coord in coords["empty"]:
         clauses.append([var2n[("empty", 0, coord)]])
-    for coord in [cell for cell in coords["cells"] if cell not in coords["empty"]]:
+    for coord in index.select(index.masks["empty"], inside=False):
         clauses.append([-var2n[("empty", 0, coord)]])
 
     # les cases avec demoness ne seront jamais vides
@@ -203,62 +181,33 @@ def clauses_initial_state(var2n: dict, coords: dict, t_max: int) -> List[Clause]
     # MOBS
     for coord in coords["mobs"]:
         clauses.append([var2n[("mob", 0, coord)]])
-    for coord in [cell for cell in coords["cells"] if cell not in coords["mobs"]]:
+    for coord in index.select(index.masks["mobs"], inside=False):
         clauses.append([-var2n[("mob", 0, coord)]])
 
     return clauses
 
 
-def succ(at: Coord, action: str) -> dict:
+def succ(at: Coord, action: str) -> Coord:
     """
     :param at: position of where is done the action
     :param action: string correspond to the action
-    :return: dict containing the pos of the successor for the given action
+    :return: position of the hero after the action (at itself if the hero does not move)
     """
-    i, j = at
-    return {
-        "left": (i, j - 1),
-        "right": (i, j + 1),
-        "up": (i - 1, j),
-        "down": (i + 1, j),
-        "hurt": (i, j),
-        "push_block_left": (i, j),
-        "push_block_right": (i, j),
-        "push_block_up": (i, j),
-        "push_block_down": (i, j),
-        "push_mob_left": (i, j),
-        "push_mob_right": (i, j),
-        "push_mob_up": (i, j),
-        "push_mob_down": (i, j),
-    }[action]
-
-
-def where_pushed(at: Coord, action: str) -> dict:
+    if action not in DELTAS:
+        return at  # hurt, push et nop laissent le héros sur place
+    di, dj = DELTAS[action]
+    return at[0] + di, at[1] + dj
+
+
+def where_pushed(at: Coord, action: str) -> Tuple[Coord, Coord]:
     """
     :param at: position of where is done the action
     :param action: action of pushing
     :return: ((pos of the pushed object), (where is pushed the object))
     """
     i, j = at
-    return {
-        "push_block_left": ((i, j - 1), (i, j - 2)),
-        "push_block_right": ((i, j + 1), (i, j + 2)),
-        "push_block_up": ((i - 1, j), (i - 2, j)),
-        "push_block_down": ((i + 1, j), (i + 2, j)),
-        "push_mob_left": ((i, j - 1), (i, j - 2)),
-        "push_mob_right": ((i, j + 1), (i, j + 2)),
-        "push_mob_up": ((i - 1, j), (i - 2, j)),
-        "push_mob_down": ((i + 1, j), (i + 2, j)),
-    }[action]
-
-
-def adjacent(at: Coord) -> List[Coord]:
-    """
-    :param at: coord
-    :return: list of directly adjacent cells
-    """
-    i, j = at
-    return [(i, j - 1), (i, j + 1), (i - 1, j), (i + 1, j)]
+    di, dj = PUSHES[action]
+    return (i + di, j + dj), (i + 2 * di, j + 2 * dj)
 
 
 def adjacent_block(at: Coord) -> List[Coord]:
@@ -271,96 +220,122 @@ def adjacent_block(at: Coord) -> List[Coord]:
 
 
 def clauses_successor_from_given_position(
-    var2n: dict, cells: List[Coord], t_max: int, position: Coord
-) -> List[Clause]:
+    var2n: dict,
+    index: LevelIndex,
+    t_max: int,
+    position: Coord,
+    actions: Tuple[str] = ACTIONS,
+    transitions: bool = True,
+) -> ClauseBuffer:
     """
     :param var2n: dict giving the corresponding number for each variable
-    :param cells: list of all cells coords
+    :param index: index of the level
     :param t_max: horizon
     :param position: position where the action is done
+    :param actions: possible actions
+    :param transitions: False to only forbid the moves into a wall, when the transitions are
+        given by the binary encoding of the position (`utils_binary`)
     :return: clauses corresponding to successor from given position
 
     """
-    Successors = {a: succ(position, a) for a in ACTIONS}
-
-    # transitions impossibles, entre deux cases non voisines ou égales
-    clauses = [
-        [-var2n[("at", t, position)], -var2n[("at", t + 1, c)]]
-        for t in range(t_max)
-        for c in cells
-        if not (c in Successors.values())
-    ]
+    # case atteinte par chaque action, None si elle sort du plateau (mur ou bord)
+    Successors = {a: index.target(position, a) for a in actions}
+    # cases atteignables, sans doublon (toutes les actions sans déplacement mènent à position)
+    reachable = list(dict.fromkeys(c for c in Successors.values() if c is not None))
 
     # actions interdites, qui feraient sortir du plateau (mur ou bord)
-    clauses += [
+    forbidden = ClauseBuffer(
         [-var2n[("at", t, position)], -var2n[("do", t, a)]]
         for t in range(t_max)
         for a, c in Successors.items()
-        if not (c in cells)
-    ]
+        if c is None
+    )
+    if not transitions:
+        return forbidden
+
+    # transitions impossibles, entre deux cases non voisines ou égales
+    unreachable = [c for c in index.cells if c not in reachable]
+    clauses = ClauseBuffer(
+        [-var2n[("at", t, position)], -var2n[("at", t + 1, c)]]
+        for t in range(t_max)
+        for c in unreachable
+    )
+
+    clauses += forbidden
 
     # transitions possibles
     for a, c in Successors.items():
-        if c in cells:
+        if c is not None:
             # at(t,position) AND do(t,a) -> at(t+1,c)
-            clauses += [
+            clauses += (
                 [
                     -var2n[("at", t, position)],
                     -var2n[("do", t, a)],
                     var2n[("at", t + 1, c)],
                 ]
                 for t in range(t_max)
-            ]
+            )
             # unicité de l'état à l'issue de l'action
-            clauses += [
+            clauses += (
                 [
                     -var2n[("at", t, position)],
                     -var2n[("do", t, a)],
                     -var2n[("at", t + 1, c1)],
                 ]
                 for t in range(t_max)
-                for c1 in Successors.values()
-                if c1 != c and c1 in cells
-            ]
+                for c1 in reachable
+                if c1 != c
+            )
 
     return clauses
 
 
-def clauses_spikes(var2n: dict, t_max: int, position: Coord) -> List[Clause]:
+def clauses_spikes(
+    var2n: dict,
+    t_max: int,
+    position: Coord,
+    actions: Tuple[str] = ACTIONS,
+    shared: bool = True,
+) -> ClauseBuffer:
     """
     :param var2n: dict giving the corresponding number for each variable
     :param t_max: horizon
     :param position: cell position
+    :param actions: possible actions
+    :param shared: also give the clauses not depending on the position (only needed once)
     :return: clauses corresponding to spikes
     """
-    clauses = []
+    clauses = ClauseBuffer()
 
     # interdit de hurt si pas sur spike
-    clauses += [
+    clauses += (
         [
             -var2n[("at", t, position)],
             -var2n[("do", t, "hurt")],
             var2n[("spike", t, position)],
         ]
         for t in range(t_max)
-    ]
+    )
 
     # pas hurt deux tours de suite
-    clauses += [
-        [-var2n[("do", t, "hurt")], -var2n[("do", t + 1, "hurt")]]
-        for t in range(t_max - 1)
-    ]
+    if shared:
+        clauses += (
+            [-var2n[("do", t, "hurt")], -var2n[("do", t + 1, "hurt")]]
+            for t in range(t_max - 1)
+        )
 
     # obliger de hurt si sur spike et pas hurt au dernier tour
-    clauses += [
+    # (sauf si la demoness est atteinte, le plan se termine alors par des nop)
+    clauses += (
         [
             var2n[("do", t - 1, "hurt")],
             var2n[("do", t, "hurt")],
             -var2n[("at", t, position)],
             -var2n[("spike", t, position)],
         ]
+        + ([var2n[("do", t, NOP)]] if NOP in actions else [])
         for t in range(1, t_max)
-    ]
+    )
 
     return clauses
 
@@ -429,6 +404,56 @@ def clauses_traps(var2n: dict, t_max: int, position: Coord) -> List[Clause]:
     return clauses
 
 
+def clauses_trap_phase(var2n: dict, coords: dict, t_max: int) -> List[Clause]:
+    """
+    :param var2n: dict giving the corresponding number for each variable
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :return: clauses corresponding to traps, all switching together with a global phase
+    """
+    clauses = []
+
+    # la phase reste la même si l'action est hurt
+    clauses += [
+        [-var2n[("do", t, "hurt")], -var2n[("phase", t)], var2n[("phase", t + 1)]]
+        for t in range(t_max)
+    ]
+    clauses += [
+        [-var2n[("do", t, "hurt")], var2n[("phase", t)], -var2n[("phase", t + 1)]]
+        for t in range(t_max)
+    ]
+
+    # la phase change si l'action n'est pas hurt
+    clauses += [
+        [var2n[("do", t, "hurt")], var2n[("phase", t)], var2n[("phase", t + 1)]]
+        for t in range(t_max)
+    ]
+    clauses += [
+        [var2n[("do", t, "hurt")], -var2n[("phase", t)], -var2n[("phase", t + 1)]]
+        for t in range(t_max)
+    ]
+
+    # un trap unsafe au départ est un spike quand la phase est vraie,
+    # un trap safe au départ est un spike quand la phase est fausse
+    for coord in coords["traps_unsafe"]:
+        clauses += [
+            [-var2n[("phase", t)], var2n[("spike", t, coord)]] for t in range(t_max + 1)
+        ]
+        clauses += [
+            [var2n[("phase", t)], -var2n[("spike", t, coord)]] for t in range(t_max + 1)
+        ]
+    for coord in coords["traps_safe"]:
+        clauses += [
+            [var2n[("phase", t)], var2n[("spike", t, coord)]] for t in range(t_max + 1)
+        ]
+        clauses += [
+            [-var2n[("phase", t)], -var2n[("spike", t, coord)]]
+            for t in range(t_max + 1)
+        ]
+
+    return clauses
+
+
 def clauses_lock_and_key(
     var2n: dict, t_max: int, lock: Coord, key: Coord
 ) -> List[Clause]:
@@ -461,36 +486,43 @@ def clauses_lock_and_key(
     return clauses
 
 
-def clauses_empty(var2n: dict, t_max: int, cell: Coord) -> List[Clause]:
+def clauses_empty(var2n: dict, t_max: int, cell: Coord) -> ClauseBuffer:
     """
     :param var2n: dict giving the corresponding number for each variable
     :param t_max: horizon
     :param cell: cell position
     :return: clauses corresponding to empty cell
     """
-    clauses = []
+    clauses = ClauseBuffer()
 
     # une case avec mob n'est pas vide
-    clauses += [
+    clauses += (
         [-var2n[("mob", t, cell)], -var2n[("empty", t, cell)]] for t in range(t_max)
-    ]
+    )
 
     # une case avec block n'est pas vide
-    clauses += [
+    clauses += (
         [-var2n[("block", t, cell)], -var2n[("empty", t, cell)]] for t in range(t_max)
-    ]
+    )
 
     return clauses
 
 
 def clauses_blocks(
-    var2n: dict, t_max: int, cells: List[Coord], position: Coord
-) -> List[Clause]:
+    var2n: dict,
+    t_max: int,
+    index: LevelIndex,
+    position: Coord,
+    actions: Tuple[str] = ACTIONS,
+    shared: bool = True,
+) -> ClauseBuffer:
     """
     :param var2n: dict giving the corresponding number for each variable
     :param t_max: horizon
-    :param cells: list of all cells coords
+    :param index: index of the level
     :param position: cell position
+    :param actions: possible actions
+    :param shared: also give the clauses not depending on the position (only needed once)
     :return: clauses corresponding to blocks
     """
     pushing_action = (
@@ -501,31 +533,34 @@ def clauses_blocks(
     )
     moving_action = ("left", "right", "up", "down")
 
-    WherePushed = {a: where_pushed(position, a) for a in pushing_action}
-    Move = {a: succ(position, a) for a in moving_action}
+    # case poussée et destination (None hors du plateau), case atteinte par chaque move
+    WherePushed = {a: index.push[position][a] for a in pushing_action}
+    Move = {a: index.succ[position][a] for a in moving_action}
+    cells = index.cells
+    adjacent_cells = index.adjacent[position]
 
-    clauses = []
+    clauses = ClauseBuffer()
 
     # PRECONDITIONS OF PUSHING
     # interdit de push une cellule qui n'est pas block
-    clauses += [
+    clauses += (
         [-var2n[("at", t, position)], var2n[("block", t, c[0])], -var2n[("do", t, a)]]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if c[0] in cells
-    ]
+        if c[0] is not None
+    )
 
     # interdit de push dans un mur
-    clauses += [
+    clauses += (
         [-var2n[("at", t, position)], -var2n[("do", t, a)]]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if not (c[0] in cells)
-    ]
+        if c[0] is None
+    )
 
     # EVOLUTIONS OF BLOCKS
     # les block non push restent à leur place
-    clauses += [
+    clauses += (
         [
             -var2n[("at", t, position)],
             var2n[("do", t, a)],
@@ -534,11 +569,11 @@ def clauses_blocks(
         ]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if c[0] in cells
-    ]
+        if c[0] is not None
+    )
 
     # les blocks non adjacent restent à leur place
-    clauses += [
+    clauses += (
         [
             -var2n[("at", t, position)],
             -var2n[("block", t, cell)],
@@ -546,13 +581,13 @@ def clauses_blocks(
         ]
         for t in range(t_max)
         for cell in cells
-        if not (cell in adjacent(position))
-    ]
+        if cell not in adjacent_cells
+    )
 
     # des blocks n'aparaissent pas si l'action n'est pas push_block
-    for a in ACTIONS:
+    for a in actions if shared else ():
         if a not in pushing_action:
-            clauses += [
+            clauses += (
                 [
                     -var2n[("do", t, a)],
                     var2n[("block", t, cell)],
@@ -560,12 +595,12 @@ def clauses_blocks(
                 ]
                 for t in range(t_max)
                 for cell in cells
-            ]
+            )
 
     # des blocks n'aparaissent pas dans une autre direction que le push si l'action est push_block
-    for a in ACTIONS:
+    for a in actions:
         if a in pushing_action:
-            clauses += [
+            clauses += (
                 [
                     -var2n[("do", t, a)],
                     -var2n[("at", t, position)],
@@ -575,11 +610,11 @@ def clauses_blocks(
                 for t in range(t_max)
                 for cell in cells
                 if cell != WherePushed[a][1]
-            ]
+            )
 
     # les blocks poussés dans un mur restent à leur place
     # c[0] correspond à case qu'on pousse, c[1] la destination
-    clauses += [
+    clauses += (
         [
             -var2n[("at", t, position)],
             -var2n[("do", t, a)],
@@ -588,12 +623,12 @@ def clauses_blocks(
         ]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if (not c[1] in cells) and (c[0] in cells)
-    ]
+        if c[1] is None and c[0] is not None
+    )
 
     # les blocks poussés dans une case non vide restent à leur place
     # c[0] correspond à case qu'on pousse, c[1] la destination
-    clauses += [
+    clauses += (
         [
             -var2n[("at", t, position)],
             -var2n[("do", t, a)],
@@ -603,12 +638,12 @@ def clauses_blocks(
         ]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if (c[0] in cells) and (c[1] in cells)
-    ]
+        if c[0] is not None and c[1] is not None
+    )
 
     # les blocks poussés dans une case vide changent de place
     # c[0] correspond à case qu'on pousse, c[1] la destination
-    clauses += [
+    clauses += (
         [
             -var2n[("at", t, position)],
             -var2n[("do", t, a)],
@@ -618,12 +653,12 @@ def clauses_blocks(
         ]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if (c[0] in cells) and (c[1] in cells)
-    ]
+        if c[0] is not None and c[1] is not None
+    )
 
     # les blocks qui ont changés de place ne sont plus au même endroit
     # c[0] correspond à case qu'on pousse, c[1] la destination
-    clauses += [
+    clauses += (
         [
             -var2n[("at", t, position)],
             -var2n[("do", t, a)],
@@ -633,58 +668,68 @@ def clauses_blocks(
         ]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if (c[0] in cells) and (c[1] in cells)
-    ]
+        if c[0] is not None and c[1] is not None
+    )
 
     # on ne peut pas traverser les blocks
-    clauses += [
+    clauses += (
         [-var2n[("at", t, position)], -var2n[("do", t, a)], -var2n[("block", t, c)]]
         for t in range(t_max)
         for a, c in Move.items()
-        if (c in cells)
-    ]
+        if c is not None
+    )
 
     return clauses
 
 
 def clauses_mobs(
-    var2n: dict, t_max: int, cells: List[Coord], position: Coord
-) -> List[Clause]:
+    var2n: dict,
+    t_max: int,
+    index: LevelIndex,
+    position: Coord,
+    actions: Tuple[str] = ACTIONS,
+    shared: bool = True,
+) -> ClauseBuffer:
     """
     :param var2n: dict giving the corresponding number for each variable
     :param t_max: horizon
-    :param cells: list of all cells coords
+    :param index: index of the level
     :param position: cell position
+    :param actions: possible actions
+    :param shared: also give the clauses not depending on the position (only needed once)
     :return: clauses corresponding to mobs
     """
     pushing_action = ("push_mob_left", "push_mob_right", "push_mob_up", "push_mob_down")
     moving_action = ("left", "right", "up", "down")
 
-    WherePushed = {a: where_pushed(position, a) for a in pushing_action}
-    Move = {a: succ(position, a) for a in moving_action}
+    # case poussée et destination (None hors du plateau), case atteinte par chaque move
+    WherePushed = {a: index.push[position][a] for a in pushing_action}
+    Move = {a: index.succ[position][a] for a in moving_action}
+    cells = index.cells
+    adjacent_cells = index.adjacent[position]
 
-    clauses = []
+    clauses = ClauseBuffer()
 
     # PRECONDITIONS OF PUSHING
     # interdit de push_mob une cellule qui n'est pas mob
-    clauses += [
+    clauses += (
         [-var2n[("at", t, position)], var2n[("mob", t, c[0])], -var2n[("do", t, a)]]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if c[0] in cells
-    ]
+        if c[0] is not None
+    )
 
     # interdit de push_mob dans un mur
-    clauses += [
+    clauses += (
         [-var2n[("at", t, position)], -var2n[("do", t, a)]]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if not (c[0] in cells)
-    ]
+        if c[0] is None
+    )
 
     # EVOLUTIONS OF MOBS
     # les mobs non push restent à leur place si la case ne devient pas un spike
-    clauses += [
+    clauses += (
         [
             -var2n[("at", t, position)],
             var2n[("do", t, a)],
@@ -694,11 +739,11 @@ def clauses_mobs(
         ]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if c[0] in cells
-    ]
+        if c[0] is not None
+    )
 
     # les mobs non adjacent restent à leur place si la case ne devient pas un spike
-    clauses += [
+    clauses += (
         [
             -var2n[("at", t, position)],
             -var2n[("mob", t, cell)],
@@ -707,13 +752,13 @@ def clauses_mobs(
         ]
         for t in range(t_max)
         for cell in cells
-        if not (cell in adjacent(position))
-    ]
+        if cell not in adjacent_cells
+    )
 
     # des mobs n'aparaissent pas si l'action n'est pas push_mob
-    for a in ACTIONS:
+    for a in actions if shared else ():
         if a not in pushing_action:
-            clauses += [
+            clauses += (
                 [
                     -var2n[("do", t, a)],
                     var2n[("mob", t, cell)],
@@ -721,12 +766,12 @@ def clauses_mobs(
                 ]
                 for t in range(t_max)
                 for cell in cells
-            ]
+            )
 
     # des mobs n'aparaissent pas dans une autre direction que le push si l'action est push_mob
-    for a in ACTIONS:
+    for a in actions:
         if a in pushing_action:
-            clauses += [
+            clauses += (
                 [
                     -var2n[("do", t, a)],
                     -var2n[("at", t, position)],
@@ -736,11 +781,11 @@ def clauses_mobs(
                 for t in range(t_max)
                 for cell in cells
                 if cell != WherePushed[a][1]
-            ]
+            )
 
     # les mobs poussés disparaissent
     # c[0] correspond à case qu'on pousse, c[1] la destination
-    clauses += [
+    clauses += (
         [
             -var2n[("at", t, position)],
             -var2n[("do", t, a)],
@@ -749,12 +794,12 @@ def clauses_mobs(
         ]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if (c[0] in cells)
-    ]
+        if c[0] is not None
+    )
 
     # les mobs poussés sur une case vide qui n'est pas un spike ou un block se déplacent
     # c[0] correspond à case qu'on pousse, c[1] la destination
-    clauses += [
+    clauses += (
         [
             -var2n[("at", t, position)],
             -var2n[("do", t, a)],
@@ -764,68 +809,283 @@ def clauses_mobs(
         ]
         for t in range(t_max)
         for a, c in WherePushed.items()
-        if (c[1] in cells)
-    ]
+        if c[1] is not None
+    )
 
     # on ne peut pas traverser les mobs
-    clauses += [
+    clauses += (
         [-var2n[("at", t, position)], -var2n[("do", t, a)], -var2n[("mob", t, c)]]
         for t in range(t_max)
         for a, c in Move.items()
-        if (c in cells)
+        if c is not None
+    )
+
+    return clauses
+
+
+def clauses_stop_at_goal(var2n: dict, coords: dict, t_max: int) -> List[Clause]:
+    """
+    :param var2n: dict giving the corresponding number for each variable
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :return: clauses allowing nop only (and always) once a demoness is reached
+    """
+    goal = goal_cells(coords)
+
+    clauses = []
+
+    # nop seulement si le héros est à côté d'une demoness
+    clauses += [
+        [-var2n[("do", t, NOP)]] + [var2n[("at", t, c)] for c in goal]
+        for t in range(t_max)
+    ]
+
+    # à côté d'une demoness, la seule action possible est nop
+    clauses += [
+        [-var2n[("at", t, c)], var2n[("do", t, NOP)]]
+        for t in range(t_max)
+        for c in goal
     ]
 
     return clauses
 
 
-def level_data_to_clauses(data: dict) -> Tuple[dict, List[Clause]]:
+def clauses_dominance(var2n: dict, coords: dict, t_max: int) -> List[Clause]:
     """
-    :param data: dict containing all level data
-    :return: all clauses corresponding to the level
+    :param var2n: dict giving the corresponding number for each variable
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :return: clauses forbidding plans which can be shortened (only valid with NOP, removing
+        two steps from a plan then leaves a shorter plan)
     """
-    coords = grid_to_coords_dict(data["grid"])
-    t_max = data["max_steps"]
-    var2n = vocabulary(coords, t_max)
+    traps = coords["traps_safe"] + coords["traps_unsafe"]
+    index = LevelIndex(coords)
+    clauses = []
 
-    clauses = clauses_exactly_one_action(var2n, t_max) + clauses_initial_state(
-        var2n, coords, t_max
-    )
+    # pas d'aller-retour immédiat, sauf pour prendre la clé ou ouvrir le lock,
+    # et sauf si des traps peuvent tuer des mobs pendant l'attente
+    if not (traps and coords["mobs"]):
+        opposite = {"left": "right", "right": "left", "up": "down", "down": "up"}
+        for a, b in opposite.items():
+            clauses += [
+                [-var2n[("do", t, a)], -var2n[("do", t + 1, b)]]
+                + [var2n[("at", t + 1, c)] for c in coords["key"] + coords["lock"]]
+                for t in range(t_max - 1)
+            ]
+
+    # sans trap, un push de block qui échoue n'est qu'une attente inutile
+    if not traps:
+        for position in index.cells:
+            for a in ACTIONS:
+                if not a.startswith("push_block"):
+                    continue
+                pushed, _ = index.push[position][a]
+                if pushed is not None:
+                    clauses += [
+                        [
+                            -var2n[("at", t, position)],
+                            -var2n[("do", t, a)],
+                            -var2n[("block", t + 1, pushed)],
+                        ]
+                        for t in range(t_max)
+                    ]
+
+    return clauses
 
-    for cell in coords["cells"]:
+
+def clauses_cells(
+    var2n: dict,
+    index: LevelIndex,
+    t_max: int,
+    cells: List[Coord],
+    actions: Tuple[str] = ACTIONS,
+    binary_position: bool = False,
+) -> ClauseBuffer:
+    """
+    :param var2n: dict giving the corresponding number for each variable
+    :param index: index of the level
+    :param t_max: horizon
+    :param cells: cells whose clauses are generated (a slice of index.cells)
+    :param actions: possible actions
+    :param binary_position: the moves of the hero are given by `utils_binary`
+    :return: clauses of the hero, spikes, blocks and mobs around these cells
+    """
+    # les générateurs de chaque case remplissent leur buffer au fil de l'eau : seule la
+    # clause en cours existe sous forme de liste Python
+    clauses = ClauseBuffer()
+
+    for cell in cells:
+        # les clauses indépendantes de la position ne sont données qu'avec la première case
+        shared = cell == index.cells[0]
         clauses += clauses_successor_from_given_position(
-            var2n, coords["cells"], t_max, cell
+            var2n, index, t_max, cell, actions, not binary_position
         )
-        clauses += clauses_spikes(var2n, t_max, cell)
+        clauses += clauses_spikes(var2n, t_max, cell, actions, shared)
         clauses += clauses_empty(var2n, t_max, cell)
-        clauses += clauses_blocks(var2n, t_max, coords["cells"], cell)
-        clauses += clauses_mobs(var2n, t_max, coords["cells"], cell)
+        clauses += clauses_blocks(var2n, t_max, index, cell, actions, shared)
+        clauses += clauses_mobs(var2n, t_max, index, cell, actions, shared)
+
+    return clauses
+
 
-    for cell in coords["cells"]:
-        if cell not in coords["lock"] + coords["demonesses"]:
+def clauses_layout(
+    var2n: dict,
+    coords: dict,
+    t_max: int,
+    actions: Tuple[str] = ACTIONS,
+    binary_position: bool = False,
+    processes: int = 1,
+) -> ClauseBuffer:
+    """
+    :param var2n: dict giving the corresponding number for each variable
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :param actions: possible actions
+    :param binary_position: the moves of the hero are given by `utils_binary`
+    :param processes: number of processes generating the clauses of the cells
+    :return: clauses depending only on the walls of the map and on the horizon
+    """
+    index = LevelIndex(coords)
+    clauses = ClauseBuffer(clauses_exactly_one_action(var2n, t_max, actions))
+
+    if binary_position:
+        from utils_binary import clauses_hero_binary
+
+        clauses += clauses_hero_binary(var2n, coords, t_max)
+
+    if processes > 1:
+        from utils_parallel_encoding import clauses_cells_parallel
+
+        clauses += clauses_cells_parallel(
+            var2n, index, t_max, actions, binary_position, processes
+        )
+    else:
+        clauses += clauses_cells(
+            var2n, index, t_max, index.cells, actions, binary_position
+        )
+
+    return clauses
+
+
+def clauses_objects(
+    var2n: dict,
+    coords: dict,
+    t_max: int,
+    trap_phase: bool = False,
+    stop_at_goal: bool = False,
+) -> ClauseBuffer:
+    """
+    :param var2n: dict giving the corresponding number for each variable
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :param trap_phase: the traps are described by a global phase
+    :param stop_at_goal: the plan ends with nop once a demoness is reached
+    :return: clauses depending on the objects placed on the map
+    """
+    index = LevelIndex(coords)
+    clauses = ClauseBuffer(
+        clauses_initial_state(var2n, coords, t_max, trap_phase, index)
+    )
+
+    never_empty = index.union("lock", "demonesses")
+    for cell in index.cells:
+        if not index.has(never_empty, cell):
             clauses += clauses_empty(var2n, t_max, cell)
+            if stop_at_goal:
+                # une case sans block ni mob est vide : un push ne peut plus échouer
+                # arbitrairement pour rallonger le plan, les nop s'en chargent
+                clauses += [
+                    [
+                        var2n[("block", t, cell)],
+                        var2n[("mob", t, cell)],
+                        var2n[("empty", t, cell)],
+                    ]
+                    for t in range(1, t_max)
+                ]
 
-    for cell in coords["traps_unsafe"] + coords["traps_safe"]:
-        clauses += clauses_traps(var2n, t_max, cell)
+    if trap_phase:
+        if coords["traps_unsafe"] + coords["traps_safe"]:
+            clauses += clauses_trap_phase(var2n, coords, t_max)
+    else:
+        for cell in coords["traps_unsafe"] + coords["traps_safe"]:
+            clauses += clauses_traps(var2n, t_max, cell)
 
     if len(coords["lock"]) > 0 and len(coords["key"]) > 0:
         clauses += clauses_lock_and_key(
             var2n, t_max, coords["lock"][0], coords["key"][0]
         )
 
-    # on doit être à côté d'une demoness à la fin
-    clauses.append(
-        [
-            var2n[("at", t_max, coord)]
-            for demoness in coords["demonesses"]
-            for coord in adjacent(demoness)
-            if coord in coords["cells"]
-        ]
-    )
+    if stop_at_goal:
+        clauses += clauses_stop_at_goal(var2n, coords, t_max)
+
+    # on doit être à côté d'une demoness (ou sur une case de coords["goal"]) à la fin
+    clauses.append([var2n[("at", t_max, coord)] for coord in goal_cells(coords)])
+
+    return clauses
+
+
+def level_data_to_clauses(
+    data: dict,
+    invariants: bool = False,
+    trap_phase: bool = False,
+    stop_at_goal: bool = False,
+    binary_position: bool = False,
+    dominance: bool = False,
+    processes: int = 1,
+) -> Tuple[dict, ClauseBuffer]:
+    """
+    :param data: dict containing all level data
+    :param invariants: add the redundant clauses inferred by `utils_invariants`
+    :param trap_phase: encode the traps with one global phase per step
+    :param stop_at_goal: plans of at most max_steps moves, completed with nop (as in ASP)
+    :param binary_position: logarithmic encoding of the position of the hero (`utils_binary`)
+    :param dominance: forbid the plans which can be shortened (needs stop_at_goal)
+    :param processes: number of processes generating the clauses of the cells
+    :return: all clauses corresponding to the level (ending next to a demoness or on one of
+        data["goal_cells"] if given, going through each (cell, deadline) of data["landmarks"]
+        at the latest at its deadline)
+    """
+    if dominance and not stop_at_goal:
+        raise ValueError("the dominance constraints need stop_at_goal")
+    actions = ACTIONS + (NOP,) if stop_at_goal else ACTIONS
+
+    with phase("coords"):
+        coords = level_coords(data)
+        if data.get("goal_cells"):
+            coords = dict(coords, goal=list(data["goal_cells"]))
+    t_max = data["max_steps"]
+    with phase("vocabulary"):
+        var2n = vocabulary(coords, t_max, trap_phase, actions)
+        if binary_position:
+            from utils_binary import binary_vocabulary
+
+            var2n = binary_vocabulary(var2n, coords, t_max)
+
+    with phase("clauses"):
+        clauses = clauses_layout(
+            var2n, coords, t_max, actions, binary_position, processes
+        )
+        clauses += clauses_objects(var2n, coords, t_max, trap_phase, stop_at_goal)
+        # cases par lesquelles passe tout plan, au plus tard au pas donné (utils_landmarks)
+        for cell, deadline in data.get("landmarks", ()):
+            clauses.append(
+                [var2n[("at", t, cell)] for t in range(min(deadline, t_max) + 1)]
+            )
+
+        if invariants:
+            from utils_invariants import clauses_invariants
+
+            clauses += clauses_invariants(
+                var2n, coords, t_max, data.get("have_key", False)
+            )
+
+        if dominance:
+            clauses += clauses_dominance(var2n, coords, t_max)
 
     return var2n, clauses
 
 
-def clauses_to_dimacs(clauses: Set[Clause], numvar: int) -> str:
+def clauses_to_dimacs(clauses: Iterable[Clause], numvar: int) -> str:
     """
     :param clauses: list of all clauses corresponding to the problem
     :param numvar: number of variables
@@ -850,70 +1110,233 @@ def write_dimacs_file(dimacs: str, filename: str, encoding: str = "utf8"):
         cnf.write(dimacs)
 
 
-def exec_gophersat(filename: str, cmd: str = "./gophersat", encoding: str = "utf8"):
+def exec_pysat(filename: str, stats: dict = None):
     """
     :param filename: name of cnf file
-    :param cmd: command to run gophersat
-    :param encoding: characters encoding
+    :param stats: dict completed with the counters of the solver (conflicts, decisions...)
     :return: Sat (bool), Model (list)
     """
-    result = subprocess.run(
-        [cmd, filename], capture_output=True, check=True, encoding=encoding
-    )
-    string = str(result.stdout)
-    lines = string.splitlines()
+    from pysat.formula import CNF
+    from pysat.solvers import Glucose4
 
-    if lines[1] != "s SATISFIABLE":
-        return False, []
+    formula = CNF(from_file=filename)
+    g = Glucose4()
+    g.append_formula(formula)
+    sat = g.solve()
 
-    model = lines[2][2:].split(" ")
+    if stats is not None:
+        stats.update(g.accum_stats())
 
-    return True, [int(x) for x in model]
+    return sat, g.get_model()
 
 
-def exec_pysat(filename: str):
+def exec_pysat_clauses(clauses: Iterable[Clause]):
     """
-    :param filename: name of cnf file
+    :param clauses: clauses given directly to the solver, without any cnf file
     :return: Sat (bool), Model (list)
     """
-    from pysat.formula import CNF
     from pysat.solvers import Glucose4
 
-    formula = CNF(from_file=filename)
     g = Glucose4()
-    g.append_formula(formula)
+    g.append_formula(clauses)  # a ClauseBuffer is given as it is, without any copy
 
     return g.solve(), g.get_model()
 
 
-def sat_solving(data: dict, solver: str = "gophersat"):
+def sat_solving(
+    data: dict,
+    solver: str = "gophersat",
+    invariants: bool = False,
+    trap_phase: bool = False,
+    simplify: bool = False,
+    timeout: float = None,
+    stop_at_goal: bool = False,
+    binary_position: bool = False,
+    return_stats: bool = False,
+):
     """
-    :param solver:
+    :param solver: "gophersat", "pysat" or any external solver of `utils_external.SOLVERS`
     :param data: dict containing all level data
-    :return: a model if sat
+    :param invariants: strengthen the encoding with the inferred invariants
+    :param trap_phase: encode the traps with one global phase per step
+    :param simplify: simplify the cnf (`utils_cnf`) before giving it to the solver
+    :param timeout: time limit of an external solver (s)
+    :param stop_at_goal: plans of at most max_steps moves, completed with nop
+    :param binary_position: logarithmic encoding of the position of the hero
+    :param return_stats: also return the statistics of the solving
+    :return: a model if sat, None if unsat (and the statistics if return_stats); ValueError
+        is raised for an unknown solver, TimeoutError when the solver gives no answer in time
     """
-    v2n, clauses = level_data_to_clauses(data)
-    n2v = {i: v for v, i in v2n.items()}
+    from time import perf_counter
+    from utils_bounds import is_trivially_infeasible
 
-    unique_clauses = {tuple(c) for c in clauses}  # avoid equal clauses
+    if solver != "pysat":
+        from utils_external import SOLVERS
 
-    dimacs = clauses_to_dimacs(unique_clauses, len(v2n))
-    filename = "helltaker.cnf"
-    write_dimacs_file(dimacs, filename)
+        if solver not in SOLVERS:
+            expected = ("pysat",) + tuple(SOLVERS)
+            raise ValueError(f"unknown solver {solver!r}, expected one of {expected}")
 
-    if solver == "gophersat":
-        sat, model = exec_gophersat(filename)
-    elif solver == "pysat":
-        sat, model = exec_pysat(filename)
-    else:
-        print("incorrect solver")
-        return None
+    stats = {"engine": "sat", "solver": solver}
+
+    def result(model):
+        return (model, stats) if return_stats else model
+
+    # inutile de construire la cnf si le plus court chemin dépasse déjà l'horizon
+    if is_trivially_infeasible(data):
+        print("pas de plan de taille", data["max_steps"])
+        stats["satisfiable"] = False
+        return result(None)
+
+    v2n, clauses = level_data_to_clauses(
+        data, invariants, trap_phase, stop_at_goal, binary_position
+    )
+    n2v = {i: v for v, i in v2n.items()}
+
+    with phase("dedup"):
+        unique_clauses = clauses.unique()  # avoid equal clauses
+    numvar = len(v2n)
+
+    if simplify:
+        from utils_cnf import simplify as simplify_cnf, expand_model
+
+        with phase("simplify"):
+            simplified = simplify_cnf(unique_clauses, numvar)
+        if simplified is None:
+            print("pas de plan de taille", data["max_steps"])
+            stats["satisfiable"] = False
+            return result(None)
+        unique_clauses, mapping = simplified
+        simp = mapping["stats"]
+        stats.update(simp)
+        numvar = simp["vars_after"]
+        print(
+            f"simplification: {simp['clauses_before']} -> {simp['clauses_after']}",
+            f"clauses, {simp['vars_before']} -> {simp['vars_after']} variables",
+            file=sys.stderr,
+        )
+
+    if solver == "pysat":
+        with phase("dimacs"):
+            dimacs = clauses_to_dimacs(unique_clauses, numvar)
+            filename = "helltaker.cnf"
+            write_dimacs_file(dimacs, filename)
+
+    stats["vars"] = numvar
+    stats["clauses"] = len(unique_clauses)
+    start = perf_counter()
+
+    with phase("solve"):
+        if solver == "pysat":
+            sat, model = exec_pysat(filename, stats)
+        else:
+            # gophersat and the other binaries of SOLVERS, with their timeout
+            from utils_external import exec_external
+
+            sat, model = exec_external(unique_clauses, numvar, solver, timeout)
+            if sat is None:
+                # tué par le timeout, ou arrêté sans donner de réponse
+                if timeout is not None and perf_counter() - start >= timeout:
+                    raise TimeoutError(f"{solver} gave no answer within {timeout} s")
+                raise RuntimeError(f"{solver} stopped without an answer")
+
+    stats["solve_s"] = perf_counter() - start
+    stats["satisfiable"] = bool(sat)
 
     if sat:
-        return [n2v[i] for i in model if i > 0 and n2v[i][0] == "do"]
+        with phase("decode"):
+            if simplify:
+                model = expand_model(model, mapping)
+            return result([n2v[i] for i in model if i > 0 and n2v[i][0] == "do"])
 
     print("pas de plan de taille", data["max_steps"])
-    return None
+    return result(None)
+
+
+def clauses_directions(var2n: dict, t_max: int) -> Tuple[dict, List[Clause]]:
+    """
+    :param var2n: dict giving the corresponding number for each variable
+    :param t_max: horizon
+    :return: numbers of the auxiliary variables ("dir", t, d) (d in udlr) and their definition
+    """
+    dir2n = {}
+    clauses = []
+    actions = {a for (_, _, a) in (v for v in var2n if v[0] == "do")}
+
+    for t in range(t_max):
+        for d in "udlr":
+            dir2n[("dir", t, d)] = x = len(var2n) + len(dir2n) + 1
+            moves = [var2n[("do", t, a)] for a in actions if convert_action(a) == d]
+            # dir(t, d) <-> une des actions de direction d
+            clauses += [[-m, x] for m in moves]
+            clauses.append([-x] + moves)
+
+    return dir2n, clauses
+
+
+def sat_enumerate(
+    data: dict,
+    projected: bool = True,
+    stop_at_goal: bool = True,
+    invariants: bool = False,
+    trap_phase: bool = False,
+) -> Iterator[List]:
+    """
+    :param data: dict containing all level data
+    :param projected: block the direction of each step (udlr) instead of the actions
+    :param stop_at_goal: plans of at most max_steps moves, completed with nop (as in ASP)
+    :param invariants: strengthen the encoding with the inferred invariants
+    :param trap_phase: encode the traps with one global phase per step
+    :return: iterator over the models (true variables "do"), computed on demand
+    """
+    from pysat.solvers import Glucose4
+    from utils_bounds import is_trivially_infeasible
+
+    if is_trivially_infeasible(data):
+        return
+
+    t_max = data["max_steps"]
+    v2n, clauses = level_data_to_clauses(data, invariants, trap_phase, stop_at_goal)
+    n2v = {i: v for v, i in v2n.items()}
+
+    with Glucose4(bootstrap_with=clauses.unique()) as g:
+        if projected:
+            dir2n, dir_clauses = clauses_directions(v2n, t_max)
+            g.append_formula(dir_clauses)
+
+        while g.solve():
+            model = g.get_model()
+            plan = [n2v[i] for i in model if i in n2v and n2v[i][0] == "do"]
+            yield plan
+
+            # clause bloquante : au moins un pas du plan doit changer
+            if projected:
+                blocking = []
+                for _, t, a in plan:
+                    d = convert_action(a)
+                    if d:
+                        blocking.append(-dir2n[("dir", t, d)])
+                    else:  # hurt ou nop : aucune direction à ce pas
+                        blocking += [dir2n[("dir", t, d)] for d in "udlr"]
+            else:
+                blocking = [-v2n[v] for v in plan]
+            g.add_clause(blocking)
+
+
+def sat_count(data: dict, invariants: bool = False, trap_phase: bool = False) -> dict:
+    """
+    :param data: dict containing all level data
+    :param invariants: strengthen the encoding with the inferred invariants
+    :param trap_phase: encode the traps with one global phase per step
+    :return: number of distinct plans (projected on the direction of each step) and timing
+    """
+    from time import perf_counter
+
+    start = perf_counter()
+    # chaque modèle est oublié dès que sa clause bloquante est ajoutée
+    plans = sum(1 for _ in sat_enumerate(data, True, True, invariants, trap_phase))
+
+    return {"plans": plans, "exhausted": True, "solve_s": perf_counter() - start}
 
 
 def convert_model(sat_model: List):
@@ -932,6 +1355,8 @@ def test():
     Test function of SAT solving
     Run: python3 utils_sat.py ../levels/level1.txt
     """
+    from time import time
+
     start = time()
     debug = False
 
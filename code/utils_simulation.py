@@ -0,0 +1,211 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module simulates Helltaker levels: it applies (udlr) plans to a level and computes exact plans
+by a breadth-first search over the states of the game.
+
+The rules are the ones of the SAT and ASP encodings:
+- moving towards a block pushes it if the cell behind is empty, otherwise the turn is lost,
+- moving towards a mob pushes it, it dies if pushed into a wall, a block or a spike,
+- the traps switch after every action which is not `hurt`,
+- standing on a spike costs an additional `hurt` action, except when the demoness is reached,
+- the lock can only be crossed once the key has been picked up.
+"""
+
+import heapq
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
+from utils_helltaker import Coord, level_coords
+
+DIRECTIONS = {"u": (-1, 0), "d": (1, 0), "l": (0, -1), "r": (0, 1)}
+
+
+class State(NamedTuple):
+    hero: Coord
+    blocks: FrozenSet[Coord]
+    mobs: FrozenSet[Coord]
+    have_key: bool
+    phase: bool  # False: traps such as in the initial grid, True: switched
+    steps: int  # number of actions done, hurts included
+
+
+def level_from_infos(infos: dict) -> dict:
+    """
+    :param infos: dict containing all map data
+    :return: static description of the level (sets of coords)
+    """
+    coords = level_coords(infos)
+    cells = set(coords["cells"])
+
+    return {
+        "cells": cells,
+        "spikes": set(coords["spikes"]),
+        "traps_safe": set(coords["traps_safe"]),
+        "traps_unsafe": set(coords["traps_unsafe"]),
+        "demonesses": set(coords["demonesses"]),
+        "key": coords["key"][0] if coords["key"] else None,
+        "lock": coords["lock"][0] if coords["lock"] else None,
+        "goal": {
+            (i + di, j + dj)
+            for i, j in coords["demonesses"]
+            for di, dj in DIRECTIONS.values()
+            if (i + di, j + dj) in cells
+        }
+        | set(infos.get("goal_cells", ())),
+    }
+
+
+def initial_state(infos: dict) -> State:
+    """
+    :param infos: dict containing all map data
+    :return: state of the level before the first action
+    """
+    coords = level_coords(infos)
+
+    return State(
+        coords["hero"][0],
+        frozenset(coords["blocks"]),
+        frozenset(coords["mobs"]),
+        infos.get("have_key", False),
+        False,
+        0,
+    )
+
+
+def is_spike(level: dict, cell: Coord, phase: bool) -> bool:
+    """
+    :param level: static description of the level
+    :param cell: coord
+    :param phase: phase of the traps
+    :return: True if the cell is a spike for the given phase of the traps
+    """
+    if cell in level["spikes"]:
+        return True
+    if phase:
+        return cell in level["traps_safe"]
+    return cell in level["traps_unsafe"]
+
+
+def is_goal(level: dict, state: State) -> bool:
+    """
+    :param level: static description of the level
+    :param state: state of the game
+    :return: True if the hero is next to a demoness
+    """
+    return state.hero in level["goal"]
+
+
+def step(level: dict, state: State, direction: str) -> Optional[State]:
+    """
+    :param level: static description of the level
+    :param state: state of the game
+    :param direction: one of udlr
+    :return: the next state (the forced hurt included), None if the move is not allowed
+    """
+    di, dj = DIRECTIONS[direction]
+    i, j = state.hero
+    target = (i + di, j + dj)
+    beyond = (i + 2 * di, j + 2 * dj)
+    cells = level["cells"]
+
+    if target not in cells:
+        return None
+
+    hero, blocks, mobs, have_key = state.hero, state.blocks, state.mobs, state.have_key
+
+    if target in blocks:
+        if (
+            beyond in cells
+            and beyond not in blocks
+            and beyond not in mobs
+            and beyond != level["lock"]
+            and beyond not in level["demonesses"]
+        ):
+            blocks = blocks - {target} | {beyond}
+    elif target in mobs:
+        mobs = mobs - {target}
+        if beyond in cells and beyond not in blocks:
+            mobs = mobs | {beyond}
+    else:
+        if target == level["lock"] and not have_key:
+            return None
+        hero = target
+        have_key = have_key or hero == level["key"]
+
+    phase = not state.phase
+    mobs = frozenset(m for m in mobs if not is_spike(level, m, phase))
+    steps = state.steps + 1
+
+    # sur un spike, le tour suivant est forcément un hurt
+    if hero not in level["goal"] and is_spike(level, hero, phase):
+        steps += 1
+
+    return State(hero, blocks, mobs, have_key, phase, steps)
+
+
+def simulate(infos: dict, plan: str) -> Tuple[State, bool]:
+    """
+    :param infos: dict containing all map data
+    :param plan: sequence of instructions (udlr)
+    :return: the state when the plan stops (demoness reached or end of plan), True if the demoness is reached
+    """
+    level = level_from_infos(infos)
+    state = initial_state(infos)
+
+    for direction in plan:
+        following = step(level, state, direction)
+        if following is None:
+            return state, False
+        state = following
+        if is_goal(level, state):
+            return state, True
+
+    return state, is_goal(level, state)
+
+
+def check_solution(infos: dict, plan: str) -> bool:
+    """
+    :param infos: dict containing all map data
+    :param plan: sequence of instructions (udlr)
+    :return: True if the plan reaches the demoness within the max number of moves
+    """
+    state, reached = simulate(infos, plan)
+    return reached and state.steps <= infos["max_steps"]
+
+
+def bfs_plan(
+    infos: dict, max_nodes: int = 200000, start: State = None
+) -> Optional[Tuple[str, int]]:
+    """
+    :param infos: dict containing all map data
+    :param max_nodes: maximal number of states to expand before giving up
+    :param start: state to start from (initial state of the level by default)
+    :return: a shortest plan (udlr) and its number of actions, None if not found
+    """
+    level = level_from_infos(infos)
+    start = start or initial_state(infos)
+
+    if is_goal(level, start):
+        return "", start.steps
+
+    # les hurt coûtent une action de plus : recherche à coût uniforme
+    queue: List[Tuple[int, int, State, str]] = [(start.steps, 0, start, "")]
+    seen = {start._replace(steps=0)}
+    counter = 0
+
+    while queue and counter < max_nodes:
+        _, _, state, plan = heapq.heappop(queue)
+        for direction in DIRECTIONS:
+            following = step(level, state, direction)
+            if following is None:
+                continue
+            if is_goal(level, following):
+                return plan + direction, following.steps
+            key = following._replace(steps=0)
+            if key not in seen:
+                seen.add(key)
+                counter += 1
+                heapq.heappush(
+                    queue, (following.steps, counter, following, plan + direction)
+                )
+
+    return None
@@ -0,0 +1,114 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module finds the optimal number of moves of a level by solving several horizons at once,
+one process per horizon, with SAT or ASP.
+
+Both engines are used in the mode where a plan may end before the horizon (nop), so that the
+existence of a plan is monotone in the horizon: as soon as a horizon is proven satisfiable, the
+longer ones are useless, and as soon as one is proven unsatisfiable, the shorter ones are too.
+Their processes are then killed. The horizons go from the lower bound of `utils_bounds` to
+max_steps and are started from the largest one, the max number of moves of the bundled levels
+being usually the optimal one.
+"""
+
+import os
+import sys
+from typing import Optional, Tuple
+from utils_bounds import plan_length_lower_bound
+
+
+def solve_horizon(engine: str, infos: dict, horizon: int, conn):
+    """
+    :param engine: "sat" or "asp"
+    :param infos: dict containing all map data
+    :param horizon: max number of moves of the plan
+    :param conn: end of the pipe receiving the plan (None if there is no plan)
+    """
+    sys.stdout = open(os.devnull, "w")  # pas de "pas de plan" pour chaque horizon
+    infos = dict(infos, max_steps=horizon)
+
+    if engine == "sat":
+        from utils_sat import sat_solving, convert_model
+
+        model = sat_solving(infos, solver="pysat", stop_at_goal=True)
+        plan = None if model is None else convert_model(model)
+    else:
+        from plan_asp import plan_asp
+
+        plan = plan_asp(infos)
+
+    conn.send(plan)
+    conn.close()
+
+
+def horizon_sweep(
+    infos: dict, engine: str = "sat", processes: int = None
+) -> Optional[Tuple[int, str]]:
+    """
+    :param infos: dict containing all map data
+    :param engine: "sat" or "asp"
+    :param processes: number of horizons solved at the same time (number of cores by default)
+    :return: the optimal number of moves and a plan of this length, None if there is no plan
+    """
+    import multiprocessing
+    from multiprocessing.connection import wait
+
+    lo = plan_length_lower_bound(infos)
+    hi = infos["max_steps"]
+    if lo is None or lo > hi:
+        return None
+
+    processes = processes or os.cpu_count() or 1
+    pending = list(range(lo, hi + 1))  # le plus grand horizon est lancé en premier
+    running = {}  # horizon -> (process, pipe)
+    best = None  # (horizon, plan) satisfiable le plus court
+
+    try:
+        while pending or running:
+            while pending and len(running) < processes:
+                horizon = pending.pop()
+                conn, child_conn = multiprocessing.Pipe(duplex=False)
+                worker = multiprocessing.Process(
+                    target=solve_horizon, args=(engine, infos, horizon, child_conn)
+                )
+                worker.start()
+                child_conn.close()
+                running[horizon] = (worker, conn)
+
+            ready = wait([conn for _, conn in running.values()])
+            horizon = next(h for h, (_, conn) in running.items() if conn in ready)
+            worker, conn = running.pop(horizon)
+            try:
+                plan = conn.recv()
+            except EOFError:  # le processus est mort sans répondre
+                raise RuntimeError(f"solving of horizon {horizon} failed")
+            finally:
+                conn.close()
+                worker.join()
+
+            if plan is not None:
+                best = (horizon, plan)
+                useless = [h for h in running if h > horizon]
+                pending = [h for h in pending if h < horizon]
+            else:
+                lo = horizon + 1
+                useless = [h for h in running if h < horizon]
+                pending = [h for h in pending if h > horizon]
+
+            # les horizons devenus inutiles sont abandonnés
+            for h in useless:
+                worker, conn = running.pop(h)
+                worker.terminate()
+                worker.join()
+                conn.close()
+
+            if best is not None and best[0] == lo:
+                break
+    finally:
+        for worker, conn in running.values():
+            worker.terminate()
+            worker.join()
+            conn.close()
+
+    return best
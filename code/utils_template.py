@@ -0,0 +1,134 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module stores the layout dependent part of the SAT encoding as reusable templates.
+
+The clauses produced by `clauses_layout` only depend on the walls of the map and on the horizon,
+they are compiled once into a binary file (the int32 literals then the int64 offsets of a
+`ClauseBuffer`) which is then memory-mapped: moving blocks, mobs or keys only requires the
+clauses of `clauses_objects`.
+"""
+
+import os
+import mmap
+import struct
+import hashlib
+from typing import List, Tuple
+from utils_clauses import ClauseBuffer
+from utils_sat import (
+    Coord,
+    grid_to_coords_dict,
+    vocabulary,
+    clauses_layout,
+    clauses_objects,
+)
+
+MAGIC = b"HTPL"
+VERSION = 2
+# magic, version, t_max, numvar, number of literals, number of clauses
+HEADER = struct.Struct("<4sIIIQQ")
+
+# templates already mapped in memory, by filename
+_LOADED = {}
+
+
+def layout_key(cells: List[Coord], t_max: int) -> str:
+    """
+    :param cells: list of all cells coords (everything which is not a wall)
+    :param t_max: horizon
+    :return: identifier of the template for this wall layout, this horizon and this format
+    """
+    digest = hashlib.sha1(repr(sorted(cells)).encode("utf8")).hexdigest()[:16]
+    return f"layout_v{VERSION}_{digest}_{t_max}"
+
+
+def compile_template(coords: dict, t_max: int, filename: str):
+    """
+    :param coords: dict containing coord of each element of the map
+    :param t_max: horizon
+    :param filename: template file to write
+    :return: write the layout clauses in binary format
+    """
+    var2n = vocabulary(coords, t_max)
+    clauses = clauses_layout(var2n, coords, t_max).unique()
+    numvar = max(map(abs, clauses.literals), default=0)
+
+    tmp = filename + ".tmp"
+    with open(tmp, "wb") as f:
+        header = (MAGIC, VERSION, t_max, numvar, len(clauses.literals), len(clauses))
+        f.write(HEADER.pack(*header))
+        clauses.literals.tofile(f)
+        clauses.offsets.tofile(f)
+    os.replace(tmp, filename)  # never leave a half-written template behind
+
+
+def load_template(filename: str) -> Tuple[int, memoryview, memoryview]:
+    """
+    :param filename: template file
+    :return: number of variables, bytes of the literals and of the offsets of the template
+        (memory-mapped)
+    """
+    if filename not in _LOADED:
+        with open(filename, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, numvar, n_literals, n_clauses = HEADER.unpack_from(mm)
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            raise ValueError(f"{filename} is not a valid template")
+        end_literals = HEADER.size + 4 * n_literals
+        end_offsets = end_literals + 8 * (n_clauses + 1)
+        view = memoryview(mm)
+        literals = view[HEADER.size : end_literals]
+        _LOADED[filename] = (numvar, literals, view[end_literals:end_offsets])
+
+    return _LOADED[filename]
+
+
+def level_data_to_clauses_template(
+    data: dict, cache_dir: str = "templates"
+) -> Tuple[dict, ClauseBuffer]:
+    """
+    :param data: dict containing all level data
+    :param cache_dir: directory where the templates are stored
+    :return: all clauses corresponding to the level, the layout part coming from the template
+    """
+    coords = grid_to_coords_dict(data["grid"])
+    t_max = data["max_steps"]
+    var2n = vocabulary(coords, t_max)
+
+    filename = os.path.join(cache_dir, layout_key(coords["cells"], t_max) + ".tpl")
+    if not os.path.exists(filename):
+        os.makedirs(cache_dir, exist_ok=True)
+        compile_template(coords, t_max, filename)
+
+    _, literals, offsets = load_template(filename)
+    clauses = ClauseBuffer.from_bytes(literals, offsets)
+    clauses += clauses_objects(var2n, coords, t_max)
+
+    return var2n, clauses
+
+
+def sat_solving_template(data: dict, cache_dir: str = "templates"):
+    """
+    :param data: dict containing all level data
+    :param cache_dir: directory where the templates are stored
+    :return: a model if sat
+    """
+    from utils_sat import exec_pysat_clauses
+    from utils_bounds import is_trivially_infeasible
+
+    # ni template ni cnf si le plus court chemin dépasse déjà l'horizon
+    if is_trivially_infeasible(data):
+        print("pas de plan de taille", data["max_steps"])
+        return None
+
+    v2n, clauses = level_data_to_clauses_template(data, cache_dir)
+    n2v = {i: v for v, i in v2n.items()}
+
+    sat, model = exec_pysat_clauses(clauses)
+
+    if sat:
+        return [n2v[i] for i in model if i > 0 and n2v[i][0] == "do"]
+
+    print("pas de plan de taille", data["max_steps"])
+    return None
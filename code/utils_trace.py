@@ -0,0 +1,170 @@
+"""
+Authors: Anne-Soline Guilbert--Ly, Romane Dauge, Pierre Gibertini
+
+This module records an opt-in trace of the solving phases: wall time and peak traced memory
+(`tracemalloc`) of each phase.
+
+The trace is disabled by default and `phase` then costs nothing. It is enabled either by the
+environment variable HELLTAKER_TRACE (name of the output file, with HELLTAKER_TRACE_FORMAT set to
+"json" or "chrome") or by the --trace option of plan_sat.py and plan_asp.py. The file is written at
+exit, either as plain JSON or in the Chrome trace format (chrome://tracing, Perfetto).
+"""
+
+import os
+import time
+
+TRACE_ENV = "HELLTAKER_TRACE"
+FORMAT_ENV = "HELLTAKER_TRACE_FORMAT"
+FORMATS = ("json", "chrome")
+
+_TRACE = None  # None tant que la trace n'est pas activée
+
+
+class _NoPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+
+
+class _Phase:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        import tracemalloc
+
+        stack = _TRACE["stack"]
+        # le pic du parent est mémorisé avant la remise à zéro du pic pour cette phase
+        if stack:
+            stack[-1]["peak_bytes"] = max(
+                stack[-1]["peak_bytes"], tracemalloc.get_traced_memory()[1]
+            )
+        tracemalloc.reset_peak()
+
+        self.event = {
+            "name": self.name,
+            "depth": len(stack),
+            "start_s": time.perf_counter() - _TRACE["origin"],
+            "peak_bytes": 0,
+        }
+        stack.append(self.event)
+        return self
+
+    def __exit__(self, *exc):
+        import tracemalloc
+
+        event = self.event
+        event["duration_s"] = time.perf_counter() - _TRACE["origin"] - event["start_s"]
+        event["peak_bytes"] = max(
+            event["peak_bytes"], tracemalloc.get_traced_memory()[1]
+        )
+
+        stack = _TRACE["stack"]
+        stack.pop()
+        if stack:
+            stack[-1]["peak_bytes"] = max(stack[-1]["peak_bytes"], event["peak_bytes"])
+        _TRACE["events"].append(event)
+        return False
+
+
+def enable(filename: str, fmt: str = "json"):
+    """
+    :param filename: file where the trace is written at exit
+    :param fmt: "json" (list of phases) or "chrome" (Chrome trace event format)
+    """
+    import atexit
+    import tracemalloc
+
+    global _TRACE
+
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown trace format {fmt!r}, expected one of {FORMATS}")
+    if _TRACE is not None:
+        _TRACE["filename"], _TRACE["format"] = filename, fmt
+        return
+
+    _TRACE = {
+        "filename": filename,
+        "format": fmt,
+        "origin": time.perf_counter(),
+        "stack": [],
+        "events": [],
+    }
+    tracemalloc.start()
+    atexit.register(write_trace)
+
+
+def enable_from_env():
+    """
+    Enable the trace if the environment variable HELLTAKER_TRACE is set
+    """
+    filename = os.environ.get(TRACE_ENV)
+    if filename:
+        enable(filename, os.environ.get(FORMAT_ENV, "json"))
+
+
+def is_enabled() -> bool:
+    """
+    :return: True if the phases are recorded
+    """
+    return _TRACE is not None
+
+
+def phase(name: str):
+    """
+    :param name: name of the phase
+    :return: context manager recording the wall time and the memory peak of the phase
+    """
+    if _TRACE is None:
+        return _NO_PHASE
+    return _Phase(name)
+
+
+def trace_events() -> list:
+    """
+    :return: the recorded phases, in chronological order of their start
+    """
+    if _TRACE is None:
+        return []
+    return sorted(_TRACE["events"], key=lambda e: e["start_s"])
+
+
+def write_trace():
+    """
+    Write the recorded phases in the trace file
+    """
+    import json
+
+    if _TRACE is None:
+        return
+
+    events = trace_events()
+    if _TRACE["format"] == "chrome":
+        content = {
+            "traceEvents": [
+                {
+                    "name": e["name"],
+                    "ph": "X",
+                    "ts": e["start_s"] * 1e6,
+                    "dur": e["duration_s"] * 1e6,
+                    "pid": os.getpid(),
+                    "tid": 0,
+                    "args": {"peak_bytes": e["peak_bytes"]},
+                }
+                for e in events
+            ],
+            "displayTimeUnit": "ms",
+        }
+    else:
+        content = {"pid": os.getpid(), "phases": events}
+
+    with open(_TRACE["filename"], "w", encoding="utf8") as f:
+        json.dump(content, f, indent=1)
+
+
+enable_from_env()